@@ -2,27 +2,44 @@ from aiogram.utils import executor
 
 from src.core.config import dp
 from src.core.enums import CacheKeys
+from src.core.secrets import METRICS_HOST, METRICS_PORT
+from src.db.counters import counters
+from src.db.journal import journal
+from src.db.writer import writes
 from src.handlers import registration
+from src.middlewares import RoleMiddleware
 from src.schedule import initialize_scheduler
-from src.utils.cache import cache, update_cache
+from src.utils.cache import cache, bus, update_cache, invalidate_cache
+from src.utils.misc import metrics
 
 
 async def on_startup(_) -> None:
     initialize_scheduler()
     await update_cache(*[el.value for el in CacheKeys])
+    bus.start(on_invalidate=invalidate_cache)
+    await journal.start()
+    if METRICS_PORT:
+        await metrics.start_server(host=METRICS_HOST, port=METRICS_PORT)
     print('Bot has been successfully activated!')
 
     return
 
 
 async def on_shutdown(_) -> None:
-    cache.close()
+    await metrics.stop_server()
+    await writes.close()
+    await journal.close()
+    await bus.close()
+    await counters.close()
+    await cache.close()
     await dp.storage.close()
 
     return
 
 
 if __name__ == "__main__":
+    # register all middlewares
+    dp.middleware.setup(RoleMiddleware())
     # register all handlers
     registration.register_handlers(dp)
     # start bot with config
@@ -0,0 +1,109 @@
+"""init
+
+Revision ID: 1c7e5b2a9f40
+Revises:
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e5b2a9f40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('tg_uid', sa.BigInteger(), nullable=False),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tg_uid')
+    )
+    op.create_table(
+        'user_profiles',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_uid', sa.Integer(), nullable=True),
+        sa.Column('username', sa.String(length=32), nullable=True),
+        sa.Column('full_name', sa.String(length=64), nullable=True),
+        sa.Column('phone', sa.String(length=11), nullable=True),
+        sa.ForeignKeyConstraint(['user_uid'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username', 'full_name', 'phone', name='user_profile_constraint')
+    )
+    op.create_table(
+        'appointments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_uid', sa.Integer(), nullable=True),
+        sa.Column('consultation_type', sa.Enum('online', 'offline', name='consultationtype'), nullable=True),
+        sa.Column('communication_type', sa.Enum('call', 'chat', name='communicationtype'), nullable=True),
+        sa.Column('user_request', sa.Text(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=True),
+        sa.Column('preferable_dt', sa.Text(), nullable=True),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_uid'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'callbacks',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_uid', sa.Integer(), nullable=True),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_uid'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'feedbacks',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_uid', sa.Integer(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_uid'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'specialities',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('title', sa.String(length=32), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'doctors',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('full_name', sa.String(length=64), nullable=False),
+        sa.Column('photo', sa.String(length=32), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('speciality_id', sa.Integer(), nullable=True),
+        sa.Column('experience', sa.Integer(), nullable=True),
+        sa.Column('science_degree', sa.Enum('phd', 'pre_phd', name='sciencedegree'), nullable=True),
+        sa.Column('qual_category', sa.Enum('highest', 'first', 'second', name='qualcategory'), nullable=True),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['speciality_id'], ['specialities.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'admins',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_uid', sa.BigInteger(), nullable=False),
+        sa.Column('full_name', sa.String(length=64), nullable=False),
+        sa.Column('privilege_type', sa.Enum('high', 'low', name='adminprivilegetype'), nullable=True),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('admins')
+    op.drop_table('doctors')
+    op.drop_table('specialities')
+    op.drop_table('feedbacks')
+    op.drop_table('callbacks')
+    op.drop_table('appointments')
+    op.drop_table('user_profiles')
+    op.drop_table('users')
@@ -0,0 +1,40 @@
+"""add indexes for hot queries
+
+Revision ID: 3f2a9c1d7b64
+Revises: 1c7e5b2a9f40
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b64'
+down_revision = '1c7e5b2a9f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # statistics (filter by creation date)
+    op.create_index(op.f('ix_appointments_dt'), 'appointments', ['dt'], unique=False)
+    op.create_index('ix_appointments_consultation_type_dt', 'appointments', ['consultation_type', 'dt'], unique=False)
+    op.create_index(op.f('ix_callbacks_dt'), 'callbacks', ['dt'], unique=False)
+    op.create_index(op.f('ix_feedbacks_dt'), 'feedbacks', ['dt'], unique=False)
+    op.create_index(op.f('ix_users_dt'), 'users', ['dt'], unique=False)
+    # catalogue
+    op.create_index(op.f('ix_doctors_photo'), 'doctors', ['photo'], unique=False)
+    op.create_index(op.f('ix_specialities_title'), 'specialities', ['title'], unique=False)
+    # admins
+    op.create_index(op.f('ix_admins_privilege_type'), 'admins', ['privilege_type'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_admins_privilege_type'), table_name='admins')
+    op.drop_index(op.f('ix_specialities_title'), table_name='specialities')
+    op.drop_index(op.f('ix_doctors_photo'), table_name='doctors')
+    op.drop_index(op.f('ix_users_dt'), table_name='users')
+    op.drop_index(op.f('ix_feedbacks_dt'), table_name='feedbacks')
+    op.drop_index(op.f('ix_callbacks_dt'), table_name='callbacks')
+    op.drop_index('ix_appointments_consultation_type_dt', table_name='appointments')
+    op.drop_index(op.f('ix_appointments_dt'), table_name='appointments')
@@ -0,0 +1,94 @@
+"""normalize doctor specialities
+
+Revision ID: 5d0b7e9f1a26
+Revises: 8c41e7a2d5f3
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0b7e9f1a26'
+down_revision = '8c41e7a2d5f3'
+branch_labels = None
+depends_on = None
+
+# first row of every doctor (rows of one doctor share the photo)
+CANONICAL = '(SELECT photo, MIN(id) AS id FROM doctors GROUP BY photo)'
+
+
+def upgrade() -> None:
+    # doctor specialities and prices
+    op.create_table(
+        'doctor_specialities',
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('speciality_id', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['speciality_id'], ['specialities.id']),
+        sa.PrimaryKeyConstraint('doctor_id', 'speciality_id')
+    )
+    op.create_index(op.f('ix_doctor_specialities_speciality_id'), 'doctor_specialities', ['speciality_id'], unique=False)
+    # backfill specialities of every doctor into its first row
+    op.execute(
+        'INSERT INTO doctor_specialities (doctor_id, speciality_id, price) '
+        'SELECT canonical.id, doctors.speciality_id, MAX(doctors.price) '
+        f'FROM doctors JOIN {CANONICAL} AS canonical ON canonical.photo = doctors.photo '
+        'WHERE doctors.speciality_id IS NOT NULL '
+        'GROUP BY canonical.id, doctors.speciality_id'
+    )
+    # point appointments to the first rows and drop the other ones
+    op.execute(
+        'UPDATE appointments '
+        'JOIN doctors ON doctors.id = appointments.doctor_id '
+        f'JOIN {CANONICAL} AS canonical ON canonical.photo = doctors.photo '
+        'SET appointments.doctor_id = canonical.id '
+        'WHERE appointments.doctor_id <> canonical.id'
+    )
+    op.execute(
+        'DELETE doctors FROM doctors '
+        f'JOIN {CANONICAL} AS canonical ON canonical.photo = doctors.photo '
+        'WHERE doctors.id <> canonical.id'
+    )
+    # drop denormalized columns
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys('doctors'):
+        if foreign_key['constrained_columns'] == ['speciality_id']:
+            op.drop_constraint(foreign_key['name'], 'doctors', type_='foreignkey')
+    op.drop_column('doctors', 'speciality_id')
+    op.drop_column('doctors', 'price')
+    # one row per doctor
+    op.drop_index(op.f('ix_doctors_photo'), table_name='doctors')
+    op.create_index(op.f('ix_doctors_photo'), 'doctors', ['photo'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_doctors_photo'), table_name='doctors')
+    op.create_index(op.f('ix_doctors_photo'), 'doctors', ['photo'], unique=False)
+    op.add_column('doctors', sa.Column('speciality_id', sa.Integer(), nullable=True))
+    op.add_column('doctors', sa.Column('price', sa.Integer(), nullable=True))
+    op.create_foreign_key(None, 'doctors', 'specialities', ['speciality_id'], ['id'])
+    # first speciality stays in the doctor row, the other ones are copied into new rows
+    op.execute(
+        'INSERT INTO doctors (full_name, photo, description, speciality_id, experience, '
+        'science_degree, qual_category, price, dt) '
+        'SELECT doctors.full_name, doctors.photo, doctors.description, doctor_specialities.speciality_id, '
+        'doctors.experience, doctors.science_degree, doctors.qual_category, doctor_specialities.price, doctors.dt '
+        'FROM doctors JOIN doctor_specialities ON doctor_specialities.doctor_id = doctors.id '
+        'WHERE doctor_specialities.speciality_id > ('
+        'SELECT MIN(speciality_id) FROM doctor_specialities AS first '
+        'WHERE first.doctor_id = doctors.id)'
+    )
+    op.execute(
+        'UPDATE doctors '
+        'JOIN doctor_specialities ON doctor_specialities.doctor_id = doctors.id '
+        'SET doctors.speciality_id = doctor_specialities.speciality_id, doctors.price = doctor_specialities.price '
+        'WHERE doctor_specialities.speciality_id = ('
+        'SELECT MIN(speciality_id) FROM doctor_specialities AS first '
+        'WHERE first.doctor_id = doctors.id)'
+    )
+    op.execute('UPDATE doctors SET price = 0 WHERE price IS NULL')
+    op.alter_column('doctors', 'price', existing_type=sa.Integer(), nullable=False)
+    op.drop_index(op.f('ix_doctor_specialities_speciality_id'), table_name='doctor_specialities')
+    op.drop_table('doctor_specialities')
@@ -0,0 +1,32 @@
+"""add daily stats
+
+Revision ID: 8c41e7a2d5f3
+Revises: 3f2a9c1d7b64
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e7a2d5f3'
+down_revision = '3f2a9c1d7b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # statistics rolled up by day (filled by the scheduler and python -m src.db.rollup)
+    op.create_table(
+        'daily_stats',
+        sa.Column('source', sa.String(length=32), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('dt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('source', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_stats')
@@ -0,0 +1,38 @@
+"""key user profiles by user
+
+Revision ID: e4b9c2d7a813
+Revises: 5d0b7e9f1a26
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b9c2d7a813'
+down_revision = '5d0b7e9f1a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # time of the last user upsert (so upserts of existing users always change the row)
+    op.add_column('users', sa.Column('seen_dt', mysql.DATETIME(fsp=6), nullable=True))
+    # the same profile data may belong to different users
+    op.drop_constraint('user_profile_constraint', 'user_profiles', type_='unique')
+    op.create_unique_constraint(
+        'user_profile_constraint', 'user_profiles',
+        ['user_uid', 'username', 'full_name', 'phone']
+    )
+
+
+def downgrade() -> None:
+    # fails if different users share the same profile data
+    op.drop_constraint('user_profile_constraint', 'user_profiles', type_='unique')
+    op.create_unique_constraint(
+        'user_profile_constraint', 'user_profiles',
+        ['username', 'full_name', 'phone']
+    )
+    op.drop_column('users', 'seen_dt')
@@ -3,17 +3,24 @@ from aiogram.dispatcher import Dispatcher
 from aiogram.contrib.fsm_storage.redis import RedisStorage2
 import asyncio
 
-from .secrets import DB_HOST, REDIS_PORT, TOKEN
+from .secrets import DB_HOST, REDIS_PORT, TOKEN, FSM_STORAGE
+from .storage import JsonMemoryStorage
 
 loop = asyncio.get_event_loop()
 
 bot = Bot(token=TOKEN)
 
-storage = RedisStorage2(
-    host=DB_HOST,
-    port=REDIS_PORT,
-    pool_size=1000
-)
+# FSM storage (redis or memory)
+if FSM_STORAGE == 'memory':
+    storage = JsonMemoryStorage()
+elif FSM_STORAGE == 'redis':
+    storage = RedisStorage2(
+        host=DB_HOST,
+        port=REDIS_PORT,
+        pool_size=1000
+    )
+else:
+    raise ValueError(f'Unknown FSM storage: {FSM_STORAGE}')
 
 dp = Dispatcher(
     bot=bot,
@@ -22,9 +22,16 @@ class Numbers(Enum):
 
 @unique
 class CacheKeys(Enum):
-    admins: str = 'admins'
+    roles: str = 'roles'
     specialities: str = 'specialities'
-    priv_admins: str = 'priv_admins'
+    catalogue: str = 'catalogue'
+
+
+@unique
+class CircuitState(Enum):
+    closed: int = 0
+    half_open: int = 1
+    open: int = 2
 
 
 class DateFormat(Enum):
@@ -39,6 +46,15 @@ class AdminPrivilegeType(Enum):
     low: str = 'low'
 
 
+@unique
+class UserRole(Enum):
+    # values of admin roles must match AdminPrivilegeType values
+    master: str = 'master'
+    high: str = 'high'
+    low: str = 'low'
+    client: str = 'client'
+
+
 @unique
 class ConsultationType(Enum):
     online: str = 'online'
@@ -311,6 +327,7 @@ class CallbackData(Enum):
 
     # doctor info sections
     # values below must have the same value as corresponding columns in table "Doctors"
+    id: str = 'id'
     photo: str = 'photo'
     full_name: str = 'full_name'
     description: str = 'description'
@@ -384,6 +401,10 @@ class BotMessageText(Enum):
                                     f'Ваш отзыв успешно отправлен администраторам!\n' \
                                     f'✅✅✅'
 
+    confirm_feedback_failure: str = f'❗❗❗\n' \
+                                    f'Не удалось отправить отзыв, пожалуйста попробуйте ещё раз\n' \
+                                    f'❗❗❗'
+
     # appointment request
     ask_cons_type: str = f'{"<b>"}{ButtonText.appointment_form.value}{"</b>"}\n' \
                          f'\n' \
@@ -413,6 +434,12 @@ class BotMessageText(Enum):
                                    f'Спасибо, что выбрали {"<b>"}{CompanyInfo.name.value}{"</b>"}!\n' \
                                    f'✅✅✅'
 
+    confirm_request_failure: str = f'❗❗❗\n' \
+                                   f'Не удалось зарегистрировать заявку, пожалуйста попробуйте ещё раз\n' \
+                                   f'❗❗❗'
+
+    request_not_saved: str = '❗ Заявка не сохранена в базе данных'
+
     # doctor creation/update
     ask_to_choose_doctor: str = 'Выберите специалиста, для обновления информации'
 
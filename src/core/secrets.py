@@ -18,10 +18,40 @@ DB_NAME = env.str('DB_NAME')  # db name
 DB_SOCKETPATH = env.str('DB_SOCKETPATH')  # db socketpath
 DB_URL = f'mysql+aiomysql://{DB_USER}:{DB_PWD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'  # db url
 # DB_URL = f'mysql+aiomysql://{DB_USER}:{DB_PWD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?unix_socket={DB_SOCKETPATH}'  # db url with socket
+DB_POOL_SIZE = env.int('DB_POOL_SIZE', 5)  # number of connections kept in the pool
+DB_MAX_OVERFLOW = env.int('DB_MAX_OVERFLOW', 10)  # max number of connections opened beyond the pool size
+DB_POOL_TIMEOUT = env.float('DB_POOL_TIMEOUT', 30)  # time in seconds to wait for a free connection
+DB_POOL_RECYCLE = env.int('DB_POOL_RECYCLE', 3600)  # connection lifetime in seconds (keep it below mysql wait_timeout)
+DB_POOL_PRE_PING = env.bool('DB_POOL_PRE_PING', True)  # check connections before using them
+WRITE_BATCH_SIZE = env.int('WRITE_BATCH_SIZE', 100)  # max number of submissions saved in one transaction
+WRITE_BATCH_DELAY = env.float('WRITE_BATCH_DELAY', 0.05)  # max time in seconds a submission waits for others
+WRITE_TIMEOUT = env.float('WRITE_TIMEOUT', 2.0)  # time in seconds after which submissions are journaled instead
+JOURNAL_PATH = env.str('JOURNAL_PATH', 'journal/submissions.jsonl')  # journal of submissions which were not saved to the db (other processes take path.1, path.2, ...)
+JOURNAL_SYNC_DELAY = env.float('JOURNAL_SYNC_DELAY', 0.01)  # time in seconds appends are grouped before fsync
+JOURNAL_REPLAY_INTERVAL = env.float('JOURNAL_REPLAY_INTERVAL', 5.0)  # time in seconds between attempts to replay the journal
 
-REDIS_PORT = env.str('REDIS_PORT')  # redis db port
-MEMCACHE_PORT = env.str('MEMCACHE_PORT')  # memcache port
+REDIS_PORT = env.str('REDIS_PORT', '6379')  # redis db port
+FSM_STORAGE = env.str('FSM_STORAGE', 'redis')  # FSM storage (redis or memory)
+REDIS_CACHE_CHANNEL = env.str('REDIS_CACHE_CHANNEL', 'cache-invalidation')  # redis channel for cache invalidation
+CACHE_BACKEND = env.str('CACHE_BACKEND', 'memcached')  # cache backend (memcached or memory - single process only)
+MEMCACHE_PORT = env.str('MEMCACHE_PORT', '11211')  # memcache port
+MEMCACHE_POOL_SIZE = env.int('MEMCACHE_POOL_SIZE', 10)  # max number of opened memcache connections
+MEMCACHE_CONNECT_TIMEOUT = env.float('MEMCACHE_CONNECT_TIMEOUT', 1.0)  # memcache connection timeout in seconds
+MEMCACHE_TIMEOUT = env.float('MEMCACHE_TIMEOUT', 0.5)  # memcache command timeout in seconds
 CACHE_TIME = env.int('CACHE_TIME')  # cache time in seconds
+CACHE_SOFT_TIME = env.int('CACHE_SOFT_TIME', 600)  # time in seconds after which cache is refreshed in background
+CACHE_EARLY_REFRESH = env.float('CACHE_EARLY_REFRESH', 1.0)  # probabilistic early refresh factor (0 disables it)
+CACHE_BREAKER_THRESHOLD = env.int('CACHE_BREAKER_THRESHOLD', 5)  # number of cache failures in a row to stop using it
+CACHE_BREAKER_COOLDOWN = env.int('CACHE_BREAKER_COOLDOWN', 30)  # time in seconds before trying cache again
+CACHE_SERIALIZER = env.str('CACHE_SERIALIZER', 'msgpack')  # cached values format (json or msgpack)
+CACHE_COMPRESS_THRESHOLD = env.int('CACHE_COMPRESS_THRESHOLD', 1024)  # min size in bytes of compressed values (0 disables compression)
+CACHE_COMPRESS_LEVEL = env.int('CACHE_COMPRESS_LEVEL', 6)  # zlib compression level
+LOCAL_CACHE_TIME = env.int('LOCAL_CACHE_TIME', 60)  # in-process cache time in seconds
+LOCAL_CACHE_SIZE = env.int('LOCAL_CACHE_SIZE', 128)  # max number of entries in the in-process cache
+STATISTIC_COUNTER_TIME = env.int('STATISTIC_COUNTER_TIME', 1296000)  # live statistics counters lifetime in seconds (longer than two weeks)
+USER_CACHE_SIZE = env.int('USER_CACHE_SIZE', 10000)  # max number of users in the in-process identity cache
+METRICS_HOST = env.str('METRICS_HOST', '127.0.0.1')  # metrics endpoint host (keep it local)
+METRICS_PORT = env.int('METRICS_PORT', 9100)  # metrics endpoint port (0 disables it)
 LOG_PATH = env.str('LOG_PATH')  # log dir
 LOG_SIZE = env.int('LOG_SIZE')  # size of log files in bytes
 N_LOGS = env.int('N_LOGS')  # number of log files
@@ -0,0 +1,29 @@
+from typing import Any, Dict, Optional, Union
+import json
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+
+class JsonMemoryStorage(MemoryStorage):
+    """
+    In-process FSM storage for development and benchmarks.
+
+    Data is passed through json as RedisStorage2 does, so handlers get the
+    same values (e.g. string dictionary keys) with both storages.
+    """
+
+    async def set_data(self, *, chat: Union[str, int, None] = None, user: Union[str, int, None] = None,
+                       data: Optional[Dict] = None) -> None:
+        await super().set_data(chat=chat, user=user, data=self._dump(data))
+
+        return
+
+    async def update_data(self, *, chat: Union[str, int, None] = None, user: Union[str, int, None] = None,
+                          data: Optional[Dict] = None, **kwargs) -> None:
+        await super().update_data(chat=chat, user=user, data=self._dump({**(data or {}), **kwargs}))
+
+        return
+
+    @staticmethod
+    def _dump(data: Any) -> Any:
+        return json.loads(json.dumps(data))
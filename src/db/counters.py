@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+
+import aioredis
+
+from src.core.secrets import CACHE_BACKEND, DB_HOST, REDIS_PORT, STATISTIC_COUNTER_TIME
+from .base import Base
+
+# hour bucket format of counter keys (its strings sort as the hours do)
+HOUR_FORMAT: str = '%Y%m%d%H'
+# moves the since key forward only
+SINCE_SCRIPT: str = """
+local since = redis.call('GET', KEYS[1])
+if not since or since < ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+"""
+
+
+def source_label(table: Base, consultation_type: Optional[str] = None) -> str:
+    if consultation_type is None:
+        return table.__tablename__
+
+    return f'{table.__tablename__}:{consultation_type}'
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def get_hours(start_date: datetime, end_date: datetime) -> List[datetime]:
+    # annotation
+    hours: List[datetime]
+    hour: datetime
+
+    hours, hour = [], floor_hour(start_date)
+    while hour < end_date:
+        hours.append(hour)
+        hour += timedelta(hours=1)
+
+    return hours
+
+
+def is_live_period(start_date: datetime, end_date: datetime, start_date_prev: Optional[datetime] = None) -> bool:
+    # periods start at whole hours and end now (hour buckets hold nothing after the end then)
+    if any(date != floor_hour(date) for date in (start_date, start_date_prev) if date is not None):
+        return False
+
+    return floor_hour(end_date) == floor_hour(datetime.now())
+
+
+class StatisticCounters(object):
+    """
+    Live statistics counters in redis bucketed by hour and source.
+
+    Counters are incremented in background after rows are committed and
+    kept for a limited time, so only short periods (day, week) are read
+    from them. Only periods which start at whole hours and end in the
+    current hour are served, so the buckets match the db boundaries.
+    Counters are trusted only since the hour following the first
+    increment (and following the last failed one).
+    """
+
+    def __init__(self, host: str, port: str, prefix: str = 'statistic', expire: int = 1296000) -> None:
+        self.prefix = prefix
+        self.expire = expire
+        self._redis = aioredis.Redis(host=host, port=port)
+        # increments which are not finished yet
+        self._pending: Set[asyncio.Future] = set()
+        # whether some increments were lost (counters are not trusted before the next hour then)
+        self._failed = False
+
+    def add(self, table: Base, consultation_type: Optional[str] = None, dt: Optional[datetime] = None) -> None:
+        # increment in background, so redis never delays the caller
+        task = asyncio.ensure_future(self.incr(source_label(table, consultation_type), dt or datetime.now()))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+        return
+
+    async def incr(self, source: str, dt: datetime) -> None:
+        # annotation
+        key: str
+        since: str
+
+        key = f'{self.prefix}:{source}:{dt.strftime(HOUR_FORMAT)}'
+        # the next hour is taken from the current time (replayed entries may carry old dates)
+        since = (floor_hour(datetime.now()) + timedelta(hours=1)).strftime(HOUR_FORMAT)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, self.expire)
+                # counters are complete since the next hour (earlier increments may be lost)
+                if self._failed:
+                    pipe.eval(SINCE_SCRIPT, 1, self._since_key(), since)
+                else:
+                    pipe.set(self._since_key(), since, nx=True)
+                await pipe.execute()
+        except (aioredis.RedisError, OSError) as e:
+            self._failed = True
+            print('Statistic counter was not incremented:', e)
+        else:
+            self._failed = False
+
+        return
+
+    async def get(self, sources: Iterable[Tuple[Base, Optional[str]]], start_date: datetime, end_date: datetime,
+                  start_date_prev: Optional[datetime] = None
+                  ) -> Optional[Dict[Tuple[Base, Optional[str]], Tuple[int, int]]]:
+        # annotation
+        hours: List[datetime]
+        hours_prev: List[datetime]
+        keys: List[str]
+        values: List[Optional[bytes]]
+        statistics: Dict[Tuple[Base, Optional[str]], Tuple[int, int]]
+
+        if not is_live_period(start_date, end_date, start_date_prev):
+            return None
+        # hour buckets of both periods (current one includes the current hour)
+        hours = get_hours(start_date, floor_hour(end_date) + timedelta(hours=1))
+        hours_prev = get_hours(start_date_prev, floor_hour(start_date)) if start_date_prev else []
+        sources = list(sources)
+        keys = [self._since_key()] + [
+            f'{self.prefix}:{source_label(*source)}:{hour.strftime(HOUR_FORMAT)}'
+            for source in sources
+            for hour in hours + hours_prev
+        ]
+        try:
+            values = await self._redis.mget(keys)
+        except (aioredis.RedisError, OSError) as e:
+            print('Statistic counters were not read:', e)
+            return None
+        # check that counters cover both periods
+        if values[0] is None or datetime.strptime(values[0].decode(), HOUR_FORMAT) > (hours_prev or hours)[0]:
+            return None
+        # sum hour buckets of every source
+        statistics, size = {}, len(hours) + len(hours_prev)
+        for i, source in enumerate(sources):
+            counts = [int(value or 0) for value in values[1 + i * size:1 + (i + 1) * size]]
+            statistics[source] = (sum(counts[:len(hours)]), sum(counts[len(hours):]))
+
+        return statistics
+
+    async def close(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self._redis.close()
+
+        return
+
+    def _since_key(self) -> str:
+        return f'{self.prefix}:since'
+
+
+class MemoryCounters(object):
+    """
+    Statistics counters of a single process (used with the in-process cache backend).
+
+    Counters are complete since the process start, so they are trusted
+    since the next hour.
+    """
+
+    def __init__(self, expire: int = 1296000) -> None:
+        self.expire = expire
+        self._counts: Dict[Tuple[str, datetime], int] = {}
+        self._since = floor_hour(datetime.now()) + timedelta(hours=1)
+
+    def add(self, table: Base, consultation_type: Optional[str] = None, dt: Optional[datetime] = None) -> None:
+        key = (source_label(table, consultation_type), floor_hour(dt or datetime.now()))
+        # drop expired counters when a new hour starts
+        if key not in self._counts:
+            expired = key[1] - timedelta(seconds=self.expire)
+            self._counts = {k: count for k, count in self._counts.items() if k[1] >= expired}
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+        return
+
+    async def get(self, sources: Iterable[Tuple[Base, Optional[str]]], start_date: datetime, end_date: datetime,
+                  start_date_prev: Optional[datetime] = None
+                  ) -> Optional[Dict[Tuple[Base, Optional[str]], Tuple[int, int]]]:
+        if not is_live_period(start_date, end_date, start_date_prev):
+            return None
+        hours = get_hours(start_date, floor_hour(end_date) + timedelta(hours=1))
+        hours_prev = get_hours(start_date_prev, floor_hour(start_date)) if start_date_prev else []
+        if self._since > (hours_prev or hours)[0]:
+            return None
+
+        return {
+            source: (
+                sum(self._counts.get((source_label(*source), hour), 0) for hour in hours),
+                sum(self._counts.get((source_label(*source), hour), 0) for hour in hours_prev)
+            )
+            for source in sources
+        }
+
+    async def close(self) -> None:
+        return
+
+
+# statistics counters (redis, or process memory for the in-process cache)
+if CACHE_BACKEND == 'memory':
+    counters = MemoryCounters(expire=STATISTIC_COUNTER_TIME)
+else:
+    counters = StatisticCounters(
+        host=DB_HOST,
+        port=REDIS_PORT,
+        expire=STATISTIC_COUNTER_TIME
+    )
@@ -0,0 +1,117 @@
+"""
+Checks that the hot queries use indexes (python -m src.db.explain).
+
+Every query is run with EXPLAIN and the indexes chosen by mysql for every
+table are compared with the expected ones. Statistics are checked with the
+statement calculate_statistics sends. Run it against a db with
+representative data, as mysql may prefer a full scan of tiny tables.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set, Tuple
+import asyncio
+import sys
+
+import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from src.core.enums import AdminPrivilegeType
+from .models import Admin, Doctor, DoctorSpeciality, Speciality
+from .query import get_rollup_range, statistics_query
+from .rollup import sources
+from .session import async_engine
+
+# statistics periods (week and the previous one)
+end_date: datetime = datetime.now()
+start_date: datetime = end_date - timedelta(days=7)
+start_date_prev: datetime = start_date - timedelta(days=7)
+
+# indexes which may be used by the statistics query (per table)
+statistics_indexes: Dict[str, Set[str]] = {
+    'appointments': {'ix_appointments_consultation_type_dt'},
+    'callbacks': {'ix_callbacks_dt'},
+    'feedbacks': {'ix_feedbacks_dt'},
+    'users': {'ix_users_dt'},
+    'daily_stats': {'PRIMARY'}
+}
+
+# query name, query, indexes which may be used (per table)
+hot_queries: List[Tuple[str, Any, Dict[str, Set[str]]]] = [
+    (
+        'doctor by photo',
+        sa.select(Doctor.id).filter(Doctor.photo == 'photo'),
+        {'doctors': {'ix_doctors_photo'}}
+    ),
+    (
+        'doctors by speciality',
+        sa.select(DoctorSpeciality.doctor_id).filter(DoctorSpeciality.speciality_id == 1),
+        {'doctor_specialities': {'ix_doctor_specialities_speciality_id'}}
+    ),
+    (
+        'speciality by title',
+        sa.select(Speciality.id).filter(Speciality.title == 'title'),
+        {'specialities': {'ix_specialities_title'}}
+    ),
+    (
+        'admins by privilege',
+        sa.select(Admin.user_uid).filter(Admin.privilege_type == AdminPrivilegeType.high),
+        {'admins': {'ix_admins_privilege_type'}}
+    )
+]
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, query: Any) -> None:
+        self.query = query
+
+
+@compiles(Explain)
+def compile_explain(element: Explain, compiler: Any, **kwargs) -> str:
+    return 'EXPLAIN ' + compiler.process(element.query, **kwargs)
+
+
+async def explain(query: Any) -> List[Dict[str, Any]]:
+    async with async_engine.connect() as connection:
+        plan = await connection.execute(Explain(query))
+
+        return [dict(row._mapping) for row in plan]
+
+
+async def get_statistics_query() -> Any:
+    # the same statement as calculate_statistics sends (it depends on the rolled up days)
+    async with async_engine.connect() as connection:
+        rolled_up = await get_rollup_range(connection)
+    query, _ = statistics_query(sources, start_date, end_date, start_date_prev, rolled_up)
+
+    return query
+
+
+async def check_indexes() -> bool:
+    # annotation
+    passed: bool
+
+    passed = True
+    queries = [('statistics of both periods', await get_statistics_query(), statistics_indexes)] + hot_queries
+    for name, query, indexes in queries:
+        plan = await explain(query)
+        # every table of the query must be read by an expected index (union results are skipped)
+        tables = [row for row in plan if row['table'] and not row['table'].startswith('<')]
+        used = {row['key'] for row in tables}
+        if tables and all(row['key'] in indexes.get(row['table'], set()) for row in tables):
+            print(f'OK   {name}: {", ".join(sorted(used))}')
+        else:
+            passed = False
+            expected = sorted(f'{table}.{index}' for table, table_indexes in indexes.items() for index in table_indexes)
+            print(f'FAIL {name}: expected {", ".join(expected)}, plan:')
+            for row in plan:
+                print(f'     table={row["table"]} type={row["type"]} '
+                      f'possible_keys={row["possible_keys"]} key={row["key"]} rows={row["rows"]}')
+    await async_engine.dispose()
+
+    return passed
+
+
+if __name__ == '__main__':
+    sys.exit(0 if asyncio.get_event_loop().run_until_complete(check_indexes()) else 1)
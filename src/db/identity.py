@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+from src.core.secrets import USER_CACHE_SIZE
+from src.utils.misc import metrics
+
+# user profile data (username, full name, phone)
+Profile = Tuple[Optional[str], Optional[str], Optional[str]]
+
+lookups = metrics.counter(
+    name='user_identity_lookups_total',
+    description='Lookups of users in the identity cache (result - hit, profile or miss)',
+    labels=('result',)
+)
+
+
+class IdentityCache(object):
+    """
+    Bounded in-process map of telegram uid to users.id and the profiles
+    known to exist.
+
+    Entries are evicted in LRU order. Only committed rows may be added,
+    otherwise ids of rolled back users would be reused.
+    """
+
+    def __init__(self, maxsize: int = 10000, max_profiles: int = 8) -> None:
+        self.maxsize = maxsize
+        self.max_profiles = max_profiles
+        # tg uid -> (user id, known profiles)
+        self._data: 'OrderedDict[int, Tuple[int, Set[Profile]]]' = OrderedDict()
+
+    def get(self, tg_uid: int, profile: Profile) -> Tuple[Optional[int], bool]:
+        # annotation
+        entry: Optional[Tuple[int, Set[Profile]]]
+
+        # return user id (if known) and whether the profile exists
+        entry = self._data.get(tg_uid)
+        if entry is None:
+            lookups.inc('miss')
+            return None, False
+        self._data.move_to_end(tg_uid)
+        lookups.inc('hit' if profile in entry[1] else 'profile')
+
+        return entry[0], profile in entry[1]
+
+    def add(self, tg_uid: int, user_id: int, profile: Profile) -> None:
+        # annotation
+        profiles: Set[Profile]
+
+        profiles = self._data[tg_uid][1] if tg_uid in self._data else set()
+        # forget profiles of users who change their data too often
+        if len(profiles) >= self.max_profiles:
+            profiles = set()
+        profiles.add(profile)
+        self._data[tg_uid] = (user_id, profiles)
+        self._data.move_to_end(tg_uid)
+        # evict the least recently used entries
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+        return
+
+
+identities = IdentityCache(maxsize=USER_CACHE_SIZE)
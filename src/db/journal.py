@@ -0,0 +1,413 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import fcntl
+import itertools
+import json
+import os
+import uuid
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from src.core.secrets import ENCODING, JOURNAL_PATH, JOURNAL_SYNC_DELAY, JOURNAL_REPLAY_INTERVAL, WRITE_BATCH_SIZE
+from src.utils.misc import metrics
+from .base import Base
+from .query import check_connection, get_rollup_range, save_submissions
+from .rollup import rollup
+from .session import get_async_session
+
+# journal entry (id, table, values) and the offset of its end
+Entry = Tuple[str, Base, Dict[str, Any], int]
+# longest time in seconds between failed replays
+MAX_REPLAY_DELAY: float = 300.0
+
+entries_total = metrics.counter(
+    name='db_journal_entries_total',
+    description='Number of journal entries (result - journaled, replayed, acknowledged or rejected)',
+    labels=('result',)
+)
+pending_entries = metrics.gauge(
+    name='db_journal_pending',
+    description='Number of journaled submissions which are not replayed yet'
+)
+sync_time = metrics.histogram(
+    name='db_journal_sync_seconds',
+    description='Time to fsync the journal'
+)
+
+
+class Journal(object):
+    """
+    Local append-only journal of submissions which were not saved to the db.
+
+    Entries are written as json lines and fsynced in groups, so a burst of
+    appends costs a single fsync. Entries are replayed in order by a
+    background task once the db is available, the offset of the first
+    unreplayed entry is kept next to the journal. Failed replays are
+    retried with backoff, only entries with invalid data are moved to the
+    rejected file. Submissions which were journaled because their save was
+    slow are acknowledged, if the save commits later, and skipped by the
+    replay. Days which are rolled up already are recounted after replay.
+
+    Every process takes its own journal (path, then path.1, path.2, ...)
+    locked for the process lifetime, so journals of stopped processes are
+    taken over by the next ones. File I/O runs in the default executor.
+    """
+
+    def __init__(self, path: str, sync_delay: float = 0.01, replay_interval: float = 5.0,
+                 replay_batch: int = 100) -> None:
+        self.base_path = path
+        # journal taken by the process
+        self.path = path
+        self.sync_delay = sync_delay
+        self.replay_interval = replay_interval
+        self.replay_batch = replay_batch
+        self._file: Optional[Any] = None
+        self._lock_file: Optional[Any] = None
+        self._opening: Optional[asyncio.Future] = None
+        # appends waiting for fsync
+        self._waiters: List[asyncio.Future] = []
+        self._syncer: Optional[asyncio.Future] = None
+        # slow saves which may still commit journaled submissions
+        self._saves: Set[asyncio.Future] = set()
+        self._replayer: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._pending = 0
+        # time to wait before the next replay (grows while replays fail)
+        self._delay = replay_interval
+
+    @property
+    def pending(self) -> bool:
+        return self._pending > 0
+
+    async def append(self, submissions: List[Tuple[Base, Dict[str, Any]]],
+                     save: Optional[asyncio.Future] = None) -> bool:
+        # annotation
+        ids: List[str]
+        future: asyncio.Future
+
+        await self._open()
+        ids = [uuid.uuid4().hex for _ in submissions]
+        for entry_id, (table, values) in zip(ids, submissions):
+            self._write({
+                'id': entry_id,
+                'table': table.__tablename__,
+                'values': values,
+                'dt': datetime.now().isoformat()
+            })
+        self._pending += len(submissions)
+        pending_entries.set(self._pending)
+        entries_total.inc('journaled', value=len(submissions))
+        # acknowledge entries which are committed by the slow save after all
+        if save is not None:
+            self._saves.add(save)
+            save.add_done_callback(lambda done: self._acknowledge(ids, done))
+        # wait for the group fsync
+        future = asyncio.get_event_loop().create_future()
+        self._waiters.append(future)
+        if self._syncer is None or self._syncer.done():
+            self._syncer = asyncio.ensure_future(self._sync())
+
+        return await asyncio.shield(future)
+
+    async def start(self) -> None:
+        await self._open()
+        if self._replayer is None:
+            self._replayer = asyncio.ensure_future(self._replay_forever())
+
+        return
+
+    async def close(self) -> None:
+        if self._replayer is not None:
+            self._replayer.cancel()
+            try:
+                await self._replayer
+            except asyncio.CancelledError:
+                pass
+            self._replayer = None
+        # wait for slow saves, so their acknowledgements are written
+        if self._saves:
+            await asyncio.gather(*self._saves, return_exceptions=True)
+        if self._syncer is not None:
+            await self._syncer
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # release the journal
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self._opening = None
+
+        return
+
+    async def replay(self) -> int:
+        # annotation
+        entries: List[Entry]
+        end: int
+        replayed: List[Entry]
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # wait for slow saves (their submissions could be committed)
+            if self._saves:
+                await asyncio.gather(*self._saves, return_exceptions=True)
+            entries, end = await self._read()
+            replayed = await self._replay(entries, end)
+            # recount days which are rolled up already (replayed submissions keep their time)
+            await self._rollup({values['dt'].date() for _, _, values, _ in replayed})
+
+            return len(replayed)
+
+    async def _replay(self, entries: List[Entry], end: int) -> List[Entry]:
+        # annotation
+        replayed: List[Entry]
+        errors: List[Exception]
+
+        replayed = []
+        for i in range(0, len(entries), self.replay_batch):
+            batch = entries[i:i + self.replay_batch]
+            if await save_submissions([(table, values) for _, table, values, _ in batch]):
+                entries_total.inc('replayed', value=len(batch))
+                replayed.extend(batch)
+                await self._commit(batch[-1][3], done=len(batch))
+                continue
+            # stop if the db is still unavailable, otherwise replay entries one by one
+            if not await check_connection():
+                self._back_off()
+                return replayed
+            for entry in batch:
+                errors = []
+                if await save_submissions([(entry[1], entry[2])], errors=errors):
+                    entries_total.inc('replayed')
+                    replayed.append(entry)
+                elif any(isinstance(e, (IntegrityError, DataError)) for e in errors):
+                    # entry with invalid data is never saved
+                    await self._reject(entry)
+                else:
+                    # retry later (entries are replayed in order)
+                    self._back_off()
+                    return replayed
+                await self._commit(entry[3], done=1)
+        # skip acknowledgements which follow the last entry
+        await self._commit(end, done=0)
+        self._delay = self.replay_interval
+
+        return replayed
+
+    async def _rollup(self, days: Iterable[date]) -> None:
+        # annotation
+        rolled_up: Optional[Tuple[date, date]]
+
+        if not days:
+            return
+        rolled_up = None
+        async with get_async_session() as session:
+            rolled_up = await get_rollup_range(session)
+        # days which are not rolled up yet are counted by the scheduled rollup
+        for day in sorted(days):
+            if rolled_up and rolled_up[0] <= day < rolled_up[1]:
+                await rollup(start_day=day, end_day=day + timedelta(days=1))
+
+        return
+
+    def _back_off(self) -> None:
+        self._delay = min(self._delay * 2, MAX_REPLAY_DELAY)
+
+        return
+
+    async def _open(self) -> None:
+        # journal is opened once (appends may come before the start)
+        if self._opening is None:
+            self._opening = asyncio.ensure_future(self._take())
+        try:
+            await asyncio.shield(self._opening)
+        except OSError:
+            # try again on the next call
+            self._opening = None
+            raise
+
+        return
+
+    async def _take(self) -> None:
+        # annotation
+        entries: List[Entry]
+
+        await asyncio.get_event_loop().run_in_executor(None, self._lock_journal)
+        # count entries left by the previous run
+        entries, _ = await self._read()
+        self._pending = len(entries)
+        pending_entries.set(self._pending)
+
+        return
+
+    def _lock_journal(self) -> None:
+        # annotation
+        path: str
+        lock_file: Any
+
+        if os.path.dirname(self.base_path):
+            os.makedirs(os.path.dirname(self.base_path), exist_ok=True)
+        # take the first journal which is not locked by another process
+        for i in itertools.count():
+            path = self.base_path if i == 0 else f'{self.base_path}.{i}'
+            lock_file = open(path + '.lock', 'a', encoding=ENCODING)
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            self.path, self._lock_file = path, lock_file
+            self._file = open(self.path, 'a', encoding=ENCODING)
+            break
+
+        return
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        return
+
+    async def _sync(self) -> None:
+        # annotation
+        loop: asyncio.AbstractEventLoop
+        synced: bool
+
+        loop = asyncio.get_event_loop()
+        # give other appends a chance to join the group
+        await asyncio.sleep(self.sync_delay)
+        while self._waiters:
+            waiters, self._waiters = self._waiters, []
+            start = loop.time()
+            try:
+                self._file.flush()
+                await loop.run_in_executor(None, os.fsync, self._file.fileno())
+                synced = True
+            except OSError as e:
+                print('Journal was not synced:', e)
+                synced = False
+            sync_time.observe(loop.time() - start)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(synced)
+
+        return
+
+    def _acknowledge(self, ids: List[str], save: asyncio.Future) -> None:
+        # annotation
+        results: List[bool]
+
+        self._saves.discard(save)
+        results = save.result() if not save.cancelled() and save.exception() is None else []
+        acknowledged = [entry_id for entry_id, saved in zip(ids, results) if saved]
+        if acknowledged and self._file is not None:
+            self._write({'ack': acknowledged})
+            self._pending -= len(acknowledged)
+            pending_entries.set(self._pending)
+            entries_total.inc('acknowledged', value=len(acknowledged))
+
+        return
+
+    async def _read(self) -> Tuple[List[Entry], int]:
+        self._file.flush()
+
+        return await asyncio.get_event_loop().run_in_executor(None, self._read_file)
+
+    def _read_file(self) -> Tuple[List[Entry], int]:
+        # annotation
+        offset: int
+        entries: List[Entry]
+        acknowledged: Set[str]
+
+        offset = self._get_offset()
+        entries, acknowledged = [], set()
+        with open(self.path, 'rb') as file:
+            file.seek(offset)
+            # only complete lines are read (the last one could be written partially)
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                record = json.loads(line.decode(ENCODING))
+                if 'ack' in record:
+                    acknowledged.update(record['ack'])
+                else:
+                    values = dict(record['values'], dt=datetime.fromisoformat(record['dt']))
+                    entries.append((record['id'], tables[record['table']], values, offset))
+
+        return [entry for entry in entries if entry[0] not in acknowledged], offset
+
+    async def _commit(self, offset: int, done: int) -> None:
+        self._pending = max(self._pending - done, 0)
+        pending_entries.set(self._pending)
+        # truncate the journal when everything is replayed (no appends are possible in between)
+        self._file.flush()
+        if not self._waiters and not self._saves and offset >= os.path.getsize(self.path):
+            self._file.truncate(0)
+            self._pending = 0
+            offset = 0
+        await asyncio.get_event_loop().run_in_executor(None, self._set_offset, offset)
+
+        return
+
+    async def _reject(self, entry: Entry) -> None:
+        print('Journal entry was rejected:', entry[0])
+        await asyncio.get_event_loop().run_in_executor(None, self._write_rejected, entry)
+        entries_total.inc('rejected')
+
+        return
+
+    def _write_rejected(self, entry: Entry) -> None:
+        with open(self.path + '.rejected', 'a', encoding=ENCODING) as file:
+            values = dict(entry[2], dt=entry[2]['dt'].isoformat())
+            file.write(json.dumps({'id': entry[0], 'table': entry[1].__tablename__, 'values': values}) + '\n')
+
+        return
+
+    def _get_offset(self) -> int:
+        try:
+            with open(self.path + '.offset', encoding=ENCODING) as file:
+                offset = int(file.read() or 0)
+        except FileNotFoundError:
+            return 0
+        # journal was truncated after the offset had been saved
+        if offset > os.path.getsize(self.path):
+            return 0
+
+        return offset
+
+    def _set_offset(self, offset: int) -> None:
+        # replace offset atomically
+        with open(self.path + '.offset.tmp', 'w', encoding=ENCODING) as file:
+            file.write(str(offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.path + '.offset.tmp', self.path + '.offset')
+
+        return
+
+    async def _replay_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self._delay)
+            if not self.pending:
+                continue
+            try:
+                replayed = await self.replay()
+            except Exception as e:
+                self._back_off()
+                print('Journal was not replayed:', e)
+            else:
+                if replayed:
+                    print('Journaled submissions were replayed:', replayed)
+
+
+# journaled tables by name
+tables: Dict[str, Base] = {mapper.class_.__tablename__: mapper.class_ for mapper in Base.registry.mappers}
+
+journal = Journal(
+    path=JOURNAL_PATH,
+    sync_delay=JOURNAL_SYNC_DELAY,
+    replay_interval=JOURNAL_REPLAY_INTERVAL,
+    replay_batch=WRITE_BATCH_SIZE
+)
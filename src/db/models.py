@@ -1,7 +1,8 @@
 from sqlalchemy import (
     Column, Integer, BigInteger, UniqueConstraint,
-    Text, Enum, ForeignKey, DateTime, String
+    Text, Enum, ForeignKey, DateTime, Date, String, Index
 )
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -17,7 +18,9 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     tg_uid = Column(BigInteger, unique=True, nullable=False)
-    dt = Column(DateTime, nullable=False, server_default=func.now())
+    dt = Column(DateTime, nullable=False, server_default=func.now(), index=True)
+    # time of the last upsert (microseconds make every upsert change the row)
+    seen_dt = Column(DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'))
 
     profile = relationship('UserProfile', back_populates='user')
     appointment = relationship('Appointment', back_populates='user')
@@ -38,7 +41,7 @@ class UserProfile(Base):
 
     __table_args__ = (
         UniqueConstraint(
-            'username', 'full_name', 'phone',
+            'user_uid', 'username', 'full_name', 'phone',
             name='user_profile_constraint'
         ),
     )
@@ -54,17 +57,21 @@ class Appointment(Base):
     user_request = Column(Text, nullable=False)
     doctor_id = Column(Integer)
     preferable_dt = Column(Text)
-    dt = Column(DateTime, nullable=False, server_default=func.now())
+    dt = Column(DateTime, nullable=False, server_default=func.now(), index=True)
 
     user = relationship('User', back_populates='appointment')
 
+    __table_args__ = (
+        Index('ix_appointments_consultation_type_dt', 'consultation_type', 'dt'),
+    )
+
 
 class CallBack(Base):
     __tablename__ = 'callbacks'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_uid = Column(Integer, ForeignKey('users.id'))
-    dt = Column(DateTime, nullable=False, server_default=func.now())
+    dt = Column(DateTime, nullable=False, server_default=func.now(), index=True)
 
     user = relationship('User', back_populates='callback')
 
@@ -75,7 +82,7 @@ class Feedback(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_uid = Column(Integer, ForeignKey('users.id'))
     message = Column(Text, nullable=False)
-    dt = Column(DateTime, nullable=False, server_default=func.now())
+    dt = Column(DateTime, nullable=False, server_default=func.now(), index=True)
 
     user = relationship('User', back_populates='feedback')
 
@@ -85,25 +92,37 @@ class Doctor(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     full_name = Column(String(length=64), nullable=False)
-    photo = Column(String(length=32), nullable=False)
+    photo = Column(String(length=32), nullable=False, unique=True, index=True)
     description = Column(Text, nullable=False)
-    speciality_id = Column(Integer, ForeignKey('specialities.id'))
     experience = Column(Integer)
     science_degree = Column(Enum(ScienceDegree))
     qual_category = Column(Enum(QualCategory))
-    price = Column(Integer, nullable=False)
     dt = Column(DateTime, nullable=False, server_default=func.now())
 
-    speciality = relationship('Speciality', back_populates='doctor', lazy='joined')
+    specialities = relationship(
+        'DoctorSpeciality', back_populates='doctor',
+        cascade='all, delete-orphan', passive_deletes=True
+    )
+
+
+class DoctorSpeciality(Base):
+    __tablename__ = 'doctor_specialities'
+
+    doctor_id = Column(Integer, ForeignKey('doctors.id', ondelete='CASCADE'), primary_key=True)
+    speciality_id = Column(Integer, ForeignKey('specialities.id'), primary_key=True, index=True)
+    price = Column(Integer, nullable=False)
+
+    doctor = relationship('Doctor', back_populates='specialities')
+    speciality = relationship('Speciality', back_populates='doctors', lazy='joined')
 
 
 class Speciality(Base):
     __tablename__ = 'specialities'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    title = Column(String(length=32), nullable=False)
+    title = Column(String(length=32), nullable=False, index=True)
 
-    doctor = relationship('Doctor', back_populates='speciality')
+    doctors = relationship('DoctorSpeciality', back_populates='speciality')
 
 
 class Admin(Base):
@@ -112,5 +131,14 @@ class Admin(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_uid = Column(BigInteger, nullable=False)
     full_name = Column(String(length=64), nullable=False)
-    privilege_type = Column(Enum(AdminPrivilegeType))
+    privilege_type = Column(Enum(AdminPrivilegeType), index=True)
+    dt = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class DailyStat(Base):
+    __tablename__ = 'daily_stats'
+
+    source = Column(String(length=32), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
     dt = Column(DateTime, nullable=False, server_default=func.now())
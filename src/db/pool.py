@@ -0,0 +1,68 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.utils.misc import metrics
+
+# connection pool metrics
+checked_out = metrics.gauge(
+    name='db_pool_checked_out',
+    description='Number of connections checked out from the pool'
+)
+overflow = metrics.gauge(
+    name='db_pool_overflow',
+    description='Number of connections opened beyond the pool size'
+)
+overflow_events = metrics.counter(
+    name='db_pool_overflow_total',
+    description='Number of times the pool opened an overflow connection'
+)
+timeouts = metrics.counter(
+    name='db_pool_timeouts_total',
+    description='Number of times no connection was available within the pool timeout'
+)
+wait_time = metrics.histogram(
+    name='db_pool_wait_seconds',
+    description='Time to get connection from the pool (including connecting)'
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Asyncio queue pool which reports checked out connections,
+    wait time, overflow connections and timeouts.
+    """
+
+    def _do_get(self):
+        # annotation
+        start: float
+        opened: int
+
+        start = time.monotonic()
+        opened = self._overflow
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            timeouts.inc()
+            raise
+        finally:
+            wait_time.observe(time.monotonic() - start)
+        # pool opened a connection beyond its size
+        if self._overflow > max(opened, 0):
+            overflow_events.inc()
+        self._report()
+
+        return connection
+
+    def _do_return_conn(self, conn) -> None:
+        super()._do_return_conn(conn)
+        self._report()
+
+        return
+
+    def _report(self) -> None:
+        checked_out.set(self.checkedout())
+        overflow.set(max(self.overflow(), 0))
+
+        return
@@ -1,125 +1,119 @@
-from datetime import datetime
-from typing import Any, List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import aliased
 
 from .base import Base
+from .counters import counters, source_label
+from .identity import identities
 from .models import (
-    UserProfile, Appointment, User, Admin,
-    Feedback, Doctor, Speciality, CallBack
+    UserProfile, User, Admin, Doctor,
+    DoctorSpeciality, Speciality, DailyStat
 )
+from .records import doctor_rows
 from .session import get_async_session
 
 
 async def get_or_create_user(session, tg_uid: int, username: Optional[str],
-                             full_name: Optional[str] = None, phone: Optional[str] = None) -> User:
-    query = sa.select(User) \
-        .filter(User.tg_uid == tg_uid)
-    user = await session.execute(query)
-    user = user.scalars().first()
-    if not user:
-        user = User(tg_uid=tg_uid)
-        profile = UserProfile(
-            user=user,
-            username=username,
-            full_name=full_name,
-            phone=phone
-        )
-        session.add_all([user, profile])
-        await session.commit()
-    else:
-        if not full_name:
-            if not username:
-                return user
-            query = sa.select(UserProfile).filter(
-                UserProfile.user_uid == user.id,
-                UserProfile.username == username
-            )
-        else:
-            if not phone:
-                query = sa.select(UserProfile).filter(
-                    UserProfile.user_uid == user.id,
-                    UserProfile.username == username,
-                    UserProfile.full_name == full_name
-                )
-            else:
-                query = sa.select(UserProfile).filter(
-                    UserProfile.user_uid == user.id,
-                    UserProfile.username == username,
-                    UserProfile.phone == phone,
-                    UserProfile.full_name == full_name
-                )
-        profile = await session.execute(query)
-        profile = profile.scalars().first()
-        if not profile:
-            profile = UserProfile(
-                user=user,
-                username=username,
-                full_name=full_name,
-                phone=phone
-            )
-            session.add(profile)
-            await session.commit()
-
-    return user
+                             full_name: Optional[str] = None, phone: Optional[str] = None) -> int:
+    # check if user and profile are known already
+    user_id, profile_exists = identities.get(tg_uid, (username, full_name, phone))
+    if profile_exists:
+        return user_id
+    created = False
+    if user_id is None:
+        # insert user or get the existing one (last_insert_id makes mysql return id in both cases),
+        # seen_dt always changes the existing row, so affected rows are 1 for the new user and 2
+        # for the existing one (an unchanged row is reported as 1 with CLIENT_FOUND_ROWS set by sqlalchemy)
+        query = insert(User) \
+            .values(tg_uid=tg_uid, seen_dt=sa.func.now(6)) \
+            .on_duplicate_key_update(id=sa.func.last_insert_id(User.id), seen_dt=sa.func.now(6))
+        user = await session.execute(query)
+        created = user.rowcount == 1
+        user_id = user.lastrowid
+    # add profile if user doesn't have the same one (all the data is compared only if it's specified),
+    # profiles are unique per user, so the same data of another user doesn't prevent the insert
+    profile = aliased(UserProfile, name='profile')
+    filters = [profile.user_uid == user_id]
+    if full_name or username:
+        filters.append(profile.username == username)
+    if full_name:
+        filters.append(profile.full_name == full_name)
+        if phone:
+            filters.append(profile.phone == phone)
+    query = insert(UserProfile) \
+        .from_select(
+            ['user_uid', 'username', 'full_name', 'phone'],
+            sa.select(
+                sa.literal(user_id),
+                sa.literal(username, sa.String),
+                sa.literal(full_name, sa.String),
+                sa.literal(phone, sa.String)
+            ).where(~sa.exists().where(*filters))
+        ) \
+        .on_duplicate_key_update(id=UserProfile.id)
+    await session.execute(query)
+    # remember (and count new) user when the caller's transaction is committed
+    sa.event.listen(
+        session.sync_session, 'after_commit',
+        lambda _: _on_user_commit(tg_uid, user_id, (username, full_name, phone), created),
+        once=True
+    )
 
+    return user_id
 
-async def create_appointment(tg_uid: int, username: Optional[str], full_name: str, phone: Optional[str],
-                             consultation_type: str, communication_type: str, user_request: str,
-                             doctor_id: int, preferable_dt: Optional[str]) -> Appointment:
-    async with get_async_session() as session:
-        user = await get_or_create_user(
-            session=session,
-            tg_uid=tg_uid,
-            username=username,
-            full_name=full_name,
-            phone=phone
-        )
-        appointment = Appointment(
-            user=user,
-            consultation_type=consultation_type,
-            communication_type=communication_type,
-            user_request=user_request,
-            doctor_id=doctor_id,
-            preferable_dt=preferable_dt
-        )
-        session.add(appointment)
-        await session.commit()
 
-        return appointment
+async def save_submissions(submissions: List[Tuple[Base, Dict[str, Any]]],
+                           errors: Optional[List[Exception]] = None) -> bool:
+    # annotation
+    rows: Dict[Base, List[Dict[str, Any]]]
+    saved: bool
 
-
-async def create_callback(tg_uid: int, username: Optional[str], full_name: str, phone: str) -> CallBack:
+    saved = False
     async with get_async_session() as session:
-        user = await get_or_create_user(
-            session=session,
-            tg_uid=tg_uid,
-            username=username,
-            full_name=full_name,
-            phone=phone
-        )
-        callback = CallBack(user=user)
-        session.add(callback)
-        await session.commit()
+        try:
+            # get users of all the submissions
+            rows = {}
+            for table, values in submissions:
+                values = dict(values)
+                user_id = await get_or_create_user(
+                    session=session,
+                    tg_uid=values.pop('tg_uid'),
+                    username=values.pop('username'),
+                    full_name=values.pop('full_name', None),
+                    phone=values.pop('phone', None)
+                )
+                rows.setdefault(table, []).append({'user_uid': user_id, **values})
+            # insert submissions of every table with one multi-row insert
+            for table, values in rows.items():
+                await session.execute(sa.insert(table), values)
+            await session.commit()
+        except Exception as e:
+            # let the caller tell invalid submissions from the unavailable db
+            if errors is not None:
+                errors.append(e)
+            raise
+        saved = True
+    # count committed submissions (replayed ones keep the time they were submitted)
+    if saved:
+        for table, values in submissions:
+            counters.add(table, values.get('consultation_type'), values.get('dt'))
+
+    return saved
 
-        return callback
 
+async def check_connection() -> bool:
+    # annotation
+    connected: bool
 
-async def create_feedback(tg_uid: int, username: Optional[str], message: str) -> Feedback:
+    connected = False
     async with get_async_session() as session:
-        user = await get_or_create_user(
-            session=session,
-            tg_uid=tg_uid,
-            username=username
-        )
-        feedback = Feedback(
-            user=user,
-            message=message
-        )
-        session.add(feedback)
-        await session.commit()
+        await session.execute(sa.select(1))
+        connected = True
 
-        return feedback
+    return connected
 
 
 async def get_specialities() -> List[str]:
@@ -132,167 +126,255 @@ async def get_specialities() -> List[str]:
         return specialities
 
 
-async def get_speciality_by_title(title: str) -> Speciality:
-    async with get_async_session() as session:
-        query = sa.select(Speciality) \
-            .filter(Speciality.title == title)
-        speciality = await session.execute(query)
-        speciality = speciality.scalars().first()
+async def get_speciality_by_title(session, title: str) -> Speciality:
+    query = sa.select(Speciality) \
+        .filter(Speciality.title == title)
+    speciality = await session.execute(query)
+    speciality = speciality.scalars().first()
 
-        return speciality
+    return speciality
 
 
-async def create_speciality(title: str) -> Speciality:
-    async with get_async_session() as session:
-        speciality = Speciality(title=title)
-        session.add(speciality)
-        await session.commit()
+async def create_speciality(session, title: str) -> Speciality:
+    speciality = Speciality(title=title)
+    session.add(speciality)
+    # get speciality id
+    await session.flush()
 
-        return speciality
+    return speciality
 
 
-async def delete_speciality(speciality_id: int) -> None:
-    async with get_async_session() as session:
-        query = sa.delete(Speciality) \
-            .filter(Speciality.id == speciality_id)
-        await session.execute(query)
-        await session.commit()
+async def delete_speciality(session, speciality_id: int) -> None:
+    query = sa.delete(Speciality) \
+        .filter(Speciality.id == speciality_id)
+    await session.execute(query)
 
-        return
+    return
 
 
-async def get_doctors() -> List[Any]:
-    async with get_async_session() as session:
-        query = sa.select(Doctor.photo.distinct().label('photo'), Doctor.full_name) \
-            .order_by(Doctor.full_name.asc())
-        doctors = await session.execute(query)
-        doctors = doctors.all()
+async def get_doctors_by_speciality(session, **attribute) -> List[Any]:
+    query = sa.select(Doctor.id, Doctor.full_name, Doctor.photo, DoctorSpeciality.price) \
+        .join_from(Doctor, DoctorSpeciality) \
+        .filter(DoctorSpeciality.speciality.has(**attribute)) \
+        .order_by(DoctorSpeciality.price.desc())
+    doctors = await session.execute(query)
+    doctors = doctors.all()
 
-        return doctors
+    return doctors
 
 
-async def get_doctors_by_speciality(**attribute) -> List[Any]:
-    async with get_async_session() as session:
-        query = sa.select(Doctor) \
-            .filter(Doctor.speciality.has(**attribute)) \
-            .order_by(Doctor.price.desc())
-        doctors = await session.execute(query)
-        doctors = doctors.scalars().all()
+async def get_doctor_specialities(session, doctor_id: int) -> List[Any]:
+    query = sa.select(Speciality.id, Speciality.title) \
+        .join_from(DoctorSpeciality, Speciality) \
+        .filter(DoctorSpeciality.doctor_id == doctor_id)
+    specialities = await session.execute(query)
+    specialities = specialities.all()
 
-        return doctors
+    return specialities
 
 
-async def get_doctor_specialities(photo: str) -> List[Any]:
-    async with get_async_session() as session:
-        query = sa.select(Doctor.speciality_id.label('id'), Speciality.title.label('title')) \
-            .join_from(Doctor, Speciality) \
-            .filter(Doctor.photo == photo)
-        specialities = await session.execute(query)
-        specialities = specialities.all()
+async def create_doctor(session, full_name: str, photo: str, description: str, prices: Dict[str, int],
+                        experience: int, science_degree: str, qual_category: str) -> Doctor:
+    # get specialities by titles (including the ones created in the same session)
+    query = sa.select(Speciality) \
+        .filter(Speciality.title.in_(list(prices)))
+    specialities = await session.execute(query)
+    specialities = specialities.scalars().all()
+    # db collation ignores case of titles, so prices are matched the same way
+    prices = {title.casefold(): price for title, price in prices.items()}
+    doctor = Doctor(
+        full_name=full_name,
+        photo=photo,
+        description=description,
+        experience=experience,
+        science_degree=science_degree,
+        qual_category=qual_category,
+        specialities=[
+            DoctorSpeciality(speciality=speciality, price=prices[speciality.title.casefold()])
+            for speciality in specialities
+        ]
+    )
+    session.add(doctor)
+    await session.flush()
 
-        return specialities
+    return doctor
 
 
-async def get_doctor_by_photo(photo: str) -> Any:
-    async with get_async_session() as session:
-        query = sa.select(
-            Doctor.full_name, Doctor.photo, Doctor.description,
-            sa.func.json_arrayagg(Doctor.speciality_id).label('speciality_id'),
-            sa.func.json_arrayagg(Speciality.title).label('speciality'),
-            Doctor.experience, Doctor.science_degree, Doctor.qual_category,
-            sa.func.json_arrayagg(Doctor.price).label('price')
-        ) \
-            .join_from(Doctor, Speciality) \
-            .group_by(Doctor.full_name, Doctor.photo, Doctor.description,
-                      Doctor.experience, Doctor.science_degree, Doctor.qual_category) \
-            .filter(Doctor.photo == photo)
-        doctor = await session.execute(query)
-        doctor = doctor.first()
+async def add_doctor_specialities(session, doctor_id: int, prices: Dict[int, int]) -> None:
+    query = sa.insert(DoctorSpeciality)
+    await session.execute(query, [
+        {'doctor_id': doctor_id, 'speciality_id': speciality_id, 'price': price}
+        for speciality_id, price in prices.items()
+    ])
 
-        return doctor
+    return
 
 
-async def create_doctor(full_name: str, photo: str, description: str, speciality_title: str,
-                        experience: int, science_degree: str, qual_category: str, price: int) -> Doctor:
-    async with get_async_session() as session:
-        speciality = await get_speciality_by_title(speciality_title)
-        doctor = Doctor(
-            full_name=full_name,
-            photo=photo,
-            description=description,
-            speciality=speciality,
-            experience=experience,
-            science_degree=science_degree,
-            qual_category=qual_category,
-            price=price
-        )
-        session.add(doctor)
-        await session.commit()
+async def update_doctor(session, doctor_id: int, column: str, value: Any, speciality_id: int = None) -> None:
+    if not speciality_id:
+        query = sa.update(Doctor) \
+            .filter(Doctor.id == doctor_id) \
+            .values({column: value})
+    else:
+        query = sa.update(DoctorSpeciality) \
+            .filter(DoctorSpeciality.doctor_id == doctor_id,
+                    DoctorSpeciality.speciality_id == speciality_id) \
+            .values({column: value})
+    await session.execute(query)
 
-        return doctor
+    return
 
 
-async def update_doctor(photo: str, column: str, value: Any, speciality_id: int = None) -> None:
-    async with get_async_session() as session:
-        if not speciality_id:
-            query = sa.update(Doctor) \
-                .filter(Doctor.photo == photo) \
-                .values({column: value})
-        else:
-            query = sa.update(Doctor) \
-                .filter(Doctor.photo == photo,
-                        Doctor.speciality_id == speciality_id) \
-                .values({column: value})
-        await session.execute(query)
-        await session.commit()
+async def delete_doctor(session, doctor_id: int, speciality_id: int = None) -> None:
+    if not speciality_id:
+        query = sa.delete(Doctor) \
+            .filter(Doctor.id == doctor_id)
+    else:
+        query = sa.delete(DoctorSpeciality) \
+            .filter(DoctorSpeciality.doctor_id == doctor_id,
+                    DoctorSpeciality.speciality_id == speciality_id)
+    await session.execute(query)
 
-        return
+    return
 
 
-async def delete_doctor(photo: str, speciality_id: int = None) -> None:
+async def get_catalogue() -> List[Dict[str, Any]]:
     async with get_async_session() as session:
-        if not speciality_id:
-            query = sa.delete(Doctor) \
-                .filter(Doctor.photo == photo)
-        else:
-            query = sa.delete(Doctor) \
-                .filter(Doctor.photo == photo,
-                        Doctor.speciality_id == speciality_id)
-        await session.execute(query)
-        await session.commit()
+        query = doctor_rows() \
+            .order_by(Doctor.id.asc(), DoctorSpeciality.speciality_id.asc())
+        doctors = await session.execute(query)
+        # one record per doctor speciality (enums are replaced with values, as cache keeps data in json)
+        doctors = [
+            {column: getattr(value, 'value', value) for column, value in doctor._mapping.items()}
+            for doctor in doctors.all()
+        ]
+
+        return doctors
 
-        return
 
+async def calculate_statistics(sources: Iterable[Tuple[Base, Optional[str]]], start_date: datetime,
+                               end_date: datetime, start_date_prev: Optional[datetime] = None
+                               ) -> Dict[Tuple[Base, Optional[str]], Tuple[int, int]]:
+    # annotation
+    labels: Dict[str, Tuple[Base, Optional[str]]]
+    statistics: Dict[Tuple[Base, Optional[str]], Tuple[int, int]]
 
-async def get_price(photo: str, speciality: str) -> int:
     async with get_async_session() as session:
-        query = sa.select(Doctor.price) \
-            .filter(Doctor.photo == photo,
-                    Doctor.speciality.has(title=speciality))
-        price = await session.execute(query)
-        price = price.scalars().first()
+        rolled_up = await get_rollup_range(session)
+        query, labels = statistics_query(sources, start_date, end_date, start_date_prev, rolled_up)
+        # get all the counts in one round trip
+        counts = await session.execute(query)
+        statistics = {source: (0, 0) for source in labels.values()}
+        for label, current, previous in counts.all():
+            statistic, statistic_prev = statistics[labels[label]]
+            statistics[labels[label]] = (statistic + int(current or 0), statistic_prev + int(previous or 0))
+
+        return statistics
+
+
+def statistics_query(sources: Iterable[Tuple[Base, Optional[str]]], start_date: datetime, end_date: datetime,
+                     start_date_prev: Optional[datetime], rolled_up: Optional[Tuple[date, date]]
+                     ) -> Tuple[Any, Dict[str, Tuple[Base, Optional[str]]]]:
+    # annotation
+    queries: List[Any]
+    labels: Dict[str, Tuple[Base, Optional[str]]]
+
+    # split periods into whole days which are rolled up and raw edges
+    raw, days = _split_period(start_date, end_date, rolled_up)
+    raw_prev, days_prev = _split_period(start_date_prev, start_date, rolled_up) if start_date_prev else ([], [])
+    queries, labels = [], {}
+    for table, consultation_type in sources:
+        label = source_label(table, consultation_type)
+        labels[label] = (table, consultation_type)
+        # count raw rows of both periods
+        if raw or raw_prev:
+            query = sa.select(
+                sa.literal(label).label('source'),
+                sa.func.sum(sa.case((_within(table.dt, raw), 1), else_=0)).label('current'),
+                sa.func.sum(sa.case((_within(table.dt, raw_prev), 1), else_=0)).label('previous')
+            ).filter(_within(table.dt, raw + raw_prev))
+            if consultation_type is not None:
+                query = query.filter(table.consultation_type == consultation_type)
+            queries.append(query)
+        # sum rolled up counts of both periods
+        if days or days_prev:
+            query = sa.select(
+                sa.literal(label).label('source'),
+                sa.func.sum(sa.case((_within(DailyStat.day, days), DailyStat.count), else_=0)).label('current'),
+                sa.func.sum(sa.case((_within(DailyStat.day, days_prev), DailyStat.count), else_=0)).label('previous')
+            ).filter(DailyStat.source == label, _within(DailyStat.day, days + days_prev))
+            queries.append(query)
+
+    # counts of all the sources (one row per source and kind of counts)
+    return sa.union_all(*queries), labels
+
+
+async def get_rollup_range(session) -> Optional[Tuple[date, date]]:
+    # get days (the last one is excluded) which are rolled up
+    query = sa.select(sa.func.min(DailyStat.day), sa.func.max(DailyStat.day))
+    rolled_up = await session.execute(query)
+    first_day, last_day = rolled_up.first()
+    if first_day is None:
+        return None
+
+    return first_day, last_day + timedelta(days=1)
+
+
+async def get_first_record_date(sources: Iterable[Tuple[Base, Optional[str]]]) -> Optional[datetime]:
+    async with get_async_session() as session:
+        query = sa.union_all(*[sa.select(sa.func.min(table.dt)) for table in {table for table, _ in sources}])
+        dates = await session.execute(query)
+        dates = [dt for dt in dates.scalars().all() if dt is not None]
+
+        return min(dates) if dates else None
 
-        return price
 
+async def rollup_statistics(sources: Iterable[Tuple[Base, Optional[str]]], start_day: date, end_day: date) -> None:
+    # annotation
+    queries: List[Any]
+    labels: List[str]
+    counts: Dict[Tuple[str, date], int]
 
-async def calculate_statistic(table: Base, start_date: datetime, end_date: datetime,
-                              consultation_type: str = None) -> int:
     async with get_async_session() as session:
-        if table == Appointment:
-            query = sa.select(sa.func.count(table.dt)).filter(
-                table.dt >= start_date,
-                table.dt < end_date,
-                table.consultation_type == consultation_type
-            )
-        else:
-            query = sa.select(sa.func.count(table.dt)).filter(
-                table.dt >= start_date,
-                table.dt < end_date
+        # count rows of every source per day
+        queries, labels = [], []
+        for table, consultation_type in sources:
+            label = source_label(table, consultation_type)
+            labels.append(label)
+            day = sa.func.date(table.dt, type_=sa.Date)
+            query = sa.select(
+                sa.literal(label).label('source'),
+                day.label('day'),
+                sa.func.count().label('count')
+            ) \
+                .filter(table.dt >= datetime.combine(start_day, time.min),
+                        table.dt < datetime.combine(end_day, time.min)) \
+                .group_by(day)
+            if consultation_type is not None:
+                query = query.filter(table.consultation_type == consultation_type)
+            queries.append(query)
+        # days without rows are saved too (so they are known to be rolled up)
+        counts = {
+            (source, start_day + timedelta(days=i)): 0
+            for source in labels
+            for i in range((end_day - start_day).days)
+        }
+        rows = await session.execute(sa.union_all(*queries))
+        for source, day, count in rows.all():
+            counts[(source, day)] = count
+        # replace rollup of the days (so recounting is idempotent)
+        query = sa.delete(DailyStat) \
+            .filter(DailyStat.day >= start_day,
+                    DailyStat.day < end_day)
+        await session.execute(query)
+        if counts:
+            await session.execute(
+                sa.insert(DailyStat),
+                [{'source': source, 'day': day, 'count': count} for (source, day), count in counts.items()]
             )
-        n = await session.execute(query)
-        n = n.scalar()
+        await session.commit()
 
-        return n
+        return
 
 
 async def get_admins_ids(privilege_type: str = None) -> List[int]:
@@ -308,6 +390,16 @@ async def get_admins_ids(privilege_type: str = None) -> List[int]:
         return admins
 
 
+async def get_admins_roles() -> Dict[str, str]:
+    async with get_async_session() as session:
+        query = sa.select(Admin.user_uid, Admin.privilege_type)
+        admins = await session.execute(query)
+        # map admin telegram uid (string, as cache keeps data in json) to privilege type
+        admins = {str(user_uid): privilege_type.value for user_uid, privilege_type in admins.all()}
+
+        return admins
+
+
 async def get_admins(privilege_type: str = None) -> List[Any]:
     async with get_async_session() as session:
         if not privilege_type:
@@ -342,3 +434,43 @@ async def delete_admin(user_uid: int) -> None:
         await session.commit()
 
         return
+
+
+def _on_user_commit(tg_uid: int, user_id: int, profile: Tuple[Optional[str], Optional[str], Optional[str]],
+                    created: bool) -> None:
+    identities.add(tg_uid, user_id, profile)
+    if created:
+        counters.add(User)
+
+    return
+
+
+def _split_period(start_date: datetime, end_date: datetime, rolled_up: Optional[Tuple[date, date]]
+                  ) -> Tuple[List[Tuple[datetime, datetime]], List[Tuple[date, date]]]:
+    # annotation
+    first_day: date
+    last_day: date
+
+    # whole days of the period which are rolled up
+    first_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+    last_day = end_date.date()
+    if rolled_up:
+        first_day, last_day = max(first_day, rolled_up[0]), min(last_day, rolled_up[1])
+    if not rolled_up or first_day >= last_day:
+        return [(start_date, end_date)], []
+    # the rest of the period is counted by raw rows
+    raw = [
+        (start, end) for start, end in (
+            (start_date, datetime.combine(first_day, time.min)),
+            (datetime.combine(last_day, time.min), end_date)
+        ) if start < end
+    ]
+
+    return raw, [(first_day, last_day)]
+
+
+def _within(column: Any, intervals: List[Tuple[Any, Any]]) -> Any:
+    if not intervals:
+        return sa.false()
+
+    return sa.or_(*[sa.and_(column >= start, column < end) for start, end in intervals])
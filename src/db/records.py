@@ -0,0 +1,96 @@
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Doctor, DoctorSpeciality, Speciality
+
+
+class DoctorRecord(object):
+    """
+    Immutable doctor profile with all the specialities and prices.
+
+    Built from plain joined rows (one row per doctor speciality), so it
+    doesn't depend on json aggregation of a particular db. Enums are kept
+    as their values, as in the catalogue cache.
+    """
+
+    __slots__ = (
+        'id', 'full_name', 'photo', 'description', 'speciality_id', 'speciality',
+        'experience', 'science_degree', 'qual_category', 'price'
+    )
+
+    id: int
+    full_name: str
+    photo: str
+    description: str
+    speciality_id: Tuple[int, ...]
+    speciality: Tuple[str, ...]
+    experience: Optional[int]
+    science_degree: Optional[str]
+    qual_category: Optional[str]
+    price: Tuple[int, ...]
+
+    def __init__(self, **fields) -> None:
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, DoctorRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(id={self.id!r}, photo={self.photo!r}, speciality={self.speciality!r})'
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> Optional['DoctorRecord']:
+        # annotation
+        records: Tuple[Mapping[str, Any], ...]
+
+        records = tuple(rows)
+        if not records:
+            return None
+
+        # doctor fields are the same in all the rows, specialities are collected into tuples
+        return cls(
+            id=records[0]['id'],
+            full_name=records[0]['full_name'],
+            photo=records[0]['photo'],
+            description=records[0]['description'],
+            speciality_id=tuple(row['speciality_id'] for row in records),
+            speciality=tuple(row['speciality'] for row in records),
+            experience=records[0]['experience'],
+            science_degree=getattr(records[0]['science_degree'], 'value', records[0]['science_degree']),
+            qual_category=getattr(records[0]['qual_category'], 'value', records[0]['qual_category']),
+            price=tuple(row['price'] for row in records)
+        )
+
+
+def doctor_rows() -> Any:
+    # one row per doctor speciality (plain join, so it runs on any db including SQLite)
+    return sa.select(
+        Doctor.id, Doctor.full_name, Doctor.photo, Doctor.description,
+        DoctorSpeciality.speciality_id, Speciality.title.label('speciality'),
+        Doctor.experience, Doctor.science_degree, Doctor.qual_category, DoctorSpeciality.price
+    ) \
+        .join_from(Doctor, DoctorSpeciality) \
+        .join_from(DoctorSpeciality, Speciality)
+
+
+async def load_doctor(session: AsyncSession, photo: str) -> Optional[DoctorRecord]:
+    query = doctor_rows() \
+        .filter(Doctor.photo == photo) \
+        .order_by(DoctorSpeciality.speciality_id.asc())
+    rows = await session.execute(query)
+
+    return DoctorRecord.from_rows(rows.mappings())
@@ -0,0 +1,77 @@
+"""
+Daily statistics rollup (python -m src.db.rollup backfills it).
+
+Counts of every statistics source are saved per day into daily_stats,
+so statistics of long periods sum whole days instead of scanning raw rows.
+Yesterday is rolled up by the scheduler, the command recounts all the days
+from the first record till yesterday.
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+import asyncio
+
+from src.core.enums import ConsultationType
+from .base import Base
+from .models import Appointment, CallBack, Feedback, User
+from .query import get_first_record_date, get_rollup_range, rollup_statistics
+from .session import async_engine, get_async_session
+
+# tables (and consultation types) which statistics are rolled up
+sources: List[Tuple[Base, Optional[str]]] = [
+    (Appointment, ConsultationType.online.value),
+    (Appointment, ConsultationType.offline.value),
+    (CallBack, None),
+    (Feedback, None),
+    (User, None)
+]
+# number of days rolled up in one transaction
+CHUNK_DAYS: int = 31
+
+
+async def rollup(start_day: date, end_day: date) -> None:
+    # annotation
+    chunk_end: date
+
+    while start_day < end_day:
+        chunk_end = min(start_day + timedelta(days=CHUNK_DAYS), end_day)
+        await rollup_statistics(sources=sources, start_day=start_day, end_day=chunk_end)
+        start_day = chunk_end
+
+    return
+
+
+async def update_rollup() -> None:
+    # annotation
+    today: date
+    rolled_up: Optional[Tuple[date, date]]
+    connected: bool
+
+    today = date.today()
+    connected = False
+    async with get_async_session() as session:
+        rolled_up = await get_rollup_range(session)
+        connected = True
+    # skip the update if the db is unavailable (the next one rolls up the missed days)
+    if not connected:
+        print('Statistics were not rolled up: db is unavailable')
+        return
+    # roll up the days passed since the last update (or yesterday only, if there is no rollup yet)
+    await rollup(start_day=rolled_up[1] if rolled_up else today - timedelta(days=1), end_day=today)
+
+    return
+
+
+async def backfill() -> None:
+    first_date = await get_first_record_date(sources)
+    if first_date is not None:
+        await rollup(start_day=first_date.date(), end_day=date.today())
+        print(f'Statistics were rolled up from {first_date.date()} till yesterday')
+    else:
+        print('There is nothing to roll up')
+    await async_engine.dispose()
+
+    return
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(backfill())
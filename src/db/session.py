@@ -1,11 +1,25 @@
 from contextlib import asynccontextmanager
+from types import TracebackType
+from typing import Optional, Type
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from src.core.secrets import DB_URL
+from src.core.secrets import (
+    DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
+from .pool import InstrumentedQueuePool
 
-async_engine = create_async_engine(DB_URL, echo=False)
+async_engine = create_async_engine(
+    DB_URL,
+    echo=False,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING
+)
 
 AsyncLocalSession = sessionmaker(
     async_engine,
@@ -24,3 +38,42 @@ async def get_async_session():
         await session.rollback()
     finally:
         await session.close()
+
+
+class UnitOfWork(object):
+    """
+    One session and one transaction for a whole action.
+
+    Queries get the session and don't commit, the transaction is committed
+    when the block is left, so an action is applied entirely or not at
+    all. Errors are printed and rolled back as in get_async_session, check
+    committed to know whether the action was applied.
+    """
+
+    def __init__(self) -> None:
+        self.session: Optional[AsyncSession] = None
+        self.committed = False
+
+    async def __aenter__(self) -> 'UnitOfWork':
+        self.session = AsyncLocalSession()
+        self.committed = False
+
+        return self
+
+    async def __aexit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                        traceback: Optional[TracebackType]) -> bool:
+        try:
+            if exc is None:
+                await self.session.commit()
+                self.committed = True
+            else:
+                print(exc)
+                await self.session.rollback()
+        except Exception as e:
+            print(e)
+            await self.session.rollback()
+        finally:
+            await self.session.close()
+
+        # errors are not propagated (as in get_async_session)
+        return exc is None or isinstance(exc, Exception)
@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import time
+
+from src.core.secrets import WRITE_BATCH_SIZE, WRITE_BATCH_DELAY, WRITE_TIMEOUT
+from src.utils.misc import metrics
+from .base import Base
+from .journal import journal
+from .models import Appointment, CallBack, Feedback
+from .query import save_submissions
+
+# submission (table, values) and its acknowledgement
+Write = Tuple[Base, Dict[str, Any], asyncio.Future]
+
+writes_total = metrics.counter(
+    name='db_writes_total',
+    description='Number of queued submissions (result - saved, journaled or failed)',
+    labels=('table', 'result')
+)
+flush_time = metrics.histogram(
+    name='db_write_flush_seconds',
+    description='Time to save a batch of submissions'
+)
+batch_size = metrics.histogram(
+    name='db_write_batch_size',
+    description='Number of submissions saved in one transaction',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250)
+)
+
+
+class WriteBehindQueue(object):
+    """
+    In-process queue which groups submissions into batched transactions.
+
+    A batch is saved when it is full or when its first submission has
+    waited max_delay. Submitters wait until their batch is committed, so
+    a submission is acknowledged only when it is saved. If a batch fails,
+    its submissions are retried one by one, so a bad submission doesn't
+    fail the others. Submissions which fail or are not saved within the
+    timeout are acknowledged once they are written to the local journal.
+    """
+
+    def __init__(self, max_batch: int = 100, max_delay: float = 0.05, timeout: float = 2.0) -> None:
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._batch: List[Write] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # batches which are being saved
+        self._flushes: Set[asyncio.Future] = set()
+
+    async def submit(self, table: Base, **values) -> bool:
+        # annotation
+        future: asyncio.Future
+
+        future = asyncio.get_event_loop().create_future()
+        self._batch.append((table, values, future))
+        # save full batch at once, otherwise wait for other submissions
+        if len(self._batch) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_event_loop().call_later(self.max_delay, self._flush)
+
+        # submission is saved even if the submitter is cancelled
+        return await asyncio.shield(future)
+
+    async def close(self) -> None:
+        # save the rest of submissions and wait for all the batches
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+        return
+
+    def _flush(self) -> None:
+        # annotation
+        batch: List[Write]
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            task = asyncio.ensure_future(self._save(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+        return
+
+    async def _save(self, batch: List[Write]) -> None:
+        # annotation
+        start: float
+        submissions: List[Tuple[Base, Dict[str, Any]]]
+        results: List[str]
+
+        start = time.monotonic()
+        submissions = [(table, values) for table, values, _ in batch]
+        if journal.pending:
+            # keep the order of submissions while the journal is replayed
+            results = await self._journal(submissions)
+        else:
+            saving = asyncio.ensure_future(self._save_all(submissions))
+            done, _ = await asyncio.wait({saving}, timeout=self.timeout)
+            if saving in done:
+                # journal failed submissions
+                failed = [submission for submission, saved in zip(submissions, saving.result()) if not saved]
+                journaled = iter(await self._journal(failed) if failed else [])
+                results = ['saved' if saved else next(journaled) for saved in saving.result()]
+            else:
+                # journal slow submissions (they are acknowledged in the journal, if the save commits later)
+                results = await self._journal(submissions, save=saving)
+        flush_time.observe(time.monotonic() - start)
+        batch_size.observe(len(batch))
+        # acknowledge submissions
+        for (table, _, future), result in zip(batch, results):
+            writes_total.inc(table.__tablename__, result)
+            if not future.done():
+                future.set_result(result != 'failed')
+
+        return
+
+    @staticmethod
+    async def _save_all(submissions: List[Tuple[Base, Dict[str, Any]]]) -> List[bool]:
+        try:
+            if await save_submissions(submissions):
+                return [True] * len(submissions)
+            if len(submissions) == 1:
+                return [False]
+            return [await save_submissions([submission]) for submission in submissions]
+        except Exception as e:
+            print('Submissions were not saved:', e)
+            return [False] * len(submissions)
+
+    @staticmethod
+    async def _journal(submissions: List[Tuple[Base, Dict[str, Any]]],
+                       save: Optional[asyncio.Future] = None) -> List[str]:
+        # annotation
+        journaled: bool
+
+        try:
+            journaled = await journal.append(submissions, save=save)
+        except (OSError, ValueError) as e:
+            print('Submissions were not journaled:', e)
+            journaled = False
+
+        return ['journaled' if journaled else 'failed'] * len(submissions)
+
+
+async def create_appointment(tg_uid: int, username: Optional[str], full_name: str, phone: Optional[str],
+                             consultation_type: str, communication_type: str, user_request: str,
+                             doctor_id: int, preferable_dt: Optional[str]) -> bool:
+    return await writes.submit(
+        Appointment,
+        tg_uid=tg_uid,
+        username=username,
+        full_name=full_name,
+        phone=phone,
+        consultation_type=consultation_type,
+        communication_type=communication_type,
+        user_request=user_request,
+        doctor_id=doctor_id,
+        preferable_dt=preferable_dt
+    )
+
+
+async def create_callback(tg_uid: int, username: Optional[str], full_name: str, phone: str) -> bool:
+    return await writes.submit(
+        CallBack,
+        tg_uid=tg_uid,
+        username=username,
+        full_name=full_name,
+        phone=phone
+    )
+
+
+async def create_feedback(tg_uid: int, username: Optional[str], message: str) -> bool:
+    return await writes.submit(
+        Feedback,
+        tg_uid=tg_uid,
+        username=username,
+        message=message
+    )
+
+
+writes = WriteBehindQueue(max_batch=WRITE_BATCH_SIZE, max_delay=WRITE_BATCH_DELAY, timeout=WRITE_TIMEOUT)
@@ -1,40 +1,27 @@
-from typing import List
-
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 
 from src.core.config import bot
-from src.core.enums import (
-    CallbackData, Symbols,
-    BotMessageText, CacheKeys
-)
-from src.core.secrets import MASTER_ADMIN
+from src.core.enums import CallbackData, Symbols, BotMessageText
 from src.keyboards import step_back
 from src.keyboards.navigation import (
-    admin_pages, admin_nav, doctors_settings_menu,
-    check_access, privilege_pages, client_nav
+    admin_pages, admin_nav, doctors_settings_menu, admin_roles,
+    privilege_roles, privilege_pages, client_nav
 )
-from src.utils.cache import get_cache
 
 
-async def admin_menu_navigation(callback_query: types.CallbackQuery):
+async def admin_menu_navigation(callback_query: types.CallbackQuery, role: str):
     # annotation
-    user_uid: int
-    admins: List[int]
     page: str
 
-    # get user uid
-    user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # get the requested page
     page = callback_query.data.split(Symbols.separator.value)[1]
     # check page and user status
     if (
-            page in privilege_pages and await check_access(user_uid=user_uid)
+            page in privilege_pages and role in privilege_roles
             or (
                 (page in admin_pages or page == CallbackData.main_menu.value)
-                and (user_uid in admins or user_uid == MASTER_ADMIN)
+                and role in admin_roles
             )
     ):
         # change the page
@@ -43,7 +30,7 @@ async def admin_menu_navigation(callback_query: types.CallbackQuery):
             parse_mode='HTML',
             reply_markup=admin_nav[page]
         )
-    elif user_uid in admins:
+    elif role in admin_roles:
         # send warning that user doesn't have enough privileges
         await callback_query.message.edit_text(
             text=BotMessageText.lack_of_privileges.value,
@@ -61,7 +48,7 @@ async def admin_menu_navigation(callback_query: types.CallbackQuery):
     return
 
 
-async def moving_back_to_menu(callback_query: types.CallbackQuery, state: FSMContext):
+async def moving_back_to_menu(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # try to delete additional messages if needed
     try:
         async with state.proxy() as data:
@@ -86,7 +73,7 @@ async def moving_back_to_menu(callback_query: types.CallbackQuery, state: FSMCon
             reply_markup=doctors_settings_menu
         )
     else:
-        await admin_menu_navigation(callback_query=callback_query)
+        await admin_menu_navigation(callback_query=callback_query, role=role)
 
     return
 
@@ -18,8 +18,8 @@ from src.keyboards import (
     admin_panel_menu, admins_config_menu, privilege_type,
     back_to_menu, main_menu_client, confirmation_menu
 )
-from src.keyboards.navigation import check_access
-from src.utils.cache import get_cache, update_cache
+from src.keyboards.navigation import admin_roles, privilege_roles
+from src.utils.cache import update_cache
 from src.utils.misc import logger
 
 
@@ -31,11 +31,11 @@ class FSMCreateAdmin(StatesGroup):
     confirmation = State()
 
 
-async def create_admin(callback_query: types.CallbackQuery, state: FSMContext):
+async def create_admin(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # exit FSM (if not finished)
     await state.finish()
     # check user access
-    if await check_access(user_uid=callback_query.from_user.id):
+    if role in privilege_roles:
         # ask to enter telegram uid
         await callback_query.message.edit_text(
             text=BotMessageText.ask_uid.value,
@@ -196,15 +196,14 @@ async def get_priv_type(callback_query: types.CallbackQuery, state: FSMContext):
     return
 
 
-async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext):
+async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
 
     # get user uid
     user_uid = callback_query.from_user.id
     # check user access
-    if await check_access(user_uid=user_uid):
+    if role in privilege_roles:
         async with state.proxy() as data:
             # add admin to the db
             await query.create_admin(
@@ -222,7 +221,7 @@ async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContex
         # set pause (give time to read)
         await asyncio.sleep(2)
         # update admins in cache
-        await update_cache(CacheKeys.priv_admins.value, CacheKeys.admins.value)
+        await update_cache(CacheKeys.roles.value)
         # move back to menu
         await callback_query.message.edit_text(
             text=BotMessageText.menu_desc(),
@@ -230,8 +229,6 @@ async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContex
             reply_markup=admins_config_menu
         )
     else:
-        # get admins
-        admins = await get_cache(key=CacheKeys.admins.value)
         # send warning that user doesn't have enough privileges
         await callback_query.message.edit_text(text=BotMessageText.lack_of_privileges.value)
         # set pause (give time to read)
@@ -240,7 +237,7 @@ async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContex
         await callback_query.message.edit_text(
             text=BotMessageText.menu_desc(),
             parse_mode='HTML',
-            reply_markup=admin_panel_menu if user_uid in admins else main_menu_client
+            reply_markup=admin_panel_menu if role in admin_roles else main_menu_client
         )
     # exit FSM
     await state.finish()
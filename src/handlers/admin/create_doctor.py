@@ -10,15 +10,17 @@ import asyncio
 from src.core.config import bot
 from src.core.enums import CallbackData, BotMessageText, Symbols, CacheKeys
 from src.core.processing import process_input
-from src.core.secrets import MASTER_ADMIN, PHOTO_GALLERY_PATH, PHOTO_EXTENSION
+from src.core.secrets import PHOTO_GALLERY_PATH, PHOTO_EXTENSION
 from src.core.validation import check_integer
 from src.db import query
+from src.db.session import UnitOfWork
 from src.keyboards import (
     show_specialities, qual_categories_list, main_menu_client,
     confirmation_menu, science_degrees_list, back_to_menu,
     doctors_settings_menu, experience_specification
 )
-from src.utils.cache import get_cache, update_cache
+from src.keyboards.navigation import admin_roles
+from src.utils.cache import catalogue, update_cache
 from src.utils.misc import logger
 
 
@@ -36,20 +38,14 @@ class FSMCreateDoctor(StatesGroup):
     confirmation = State()
 
 
-async def create_doctor(callback_query: types.CallbackQuery, state: FSMContext):
+async def create_doctor(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
-    user_uid: int
-    admins: List[int]
     specialities: List[str]
 
     # exit FSM (if not finished)
     await state.finish()
-    # get user uid
-    user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user status (admin or not)
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         # get all the existing specialities
         specialities = await query.get_specialities()
         # set the first state (enter FSM)
@@ -448,45 +444,49 @@ async def get_price(message: types.Message, state: FSMContext):
     return
 
 
-async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext):
+async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
+    new_specialities: List[str]
     cache_update_required: bool
     bot_message: types.Message
 
     # get user uid
     user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user access
-    if user_uid == MASTER_ADMIN or user_uid in admins:
-        # set the flag to understand if it is needed to update cache
-        cache_update_required = False
+    if role in admin_roles:
         async with state.proxy() as data:
-            for speciality in data['specialities']:
-                # check if speciality is new
-                if speciality not in data['specialities_pool'].values():
+            # create new specialities and doctor in one transaction
+            async with UnitOfWork() as uow:
+                new_specialities = [
+                    speciality for speciality in data['specialities']
+                    if speciality not in data['specialities_pool'].values()
+                ]
+                for speciality in new_specialities:
                     # create speciality
-                    await query.create_speciality(title=speciality)
-                    # log the speciality creation
-                    logger.info(f'admin {user_uid} created speciality "{speciality}"')
-                    # change flag
-                    cache_update_required = True
-                # add doctor to the db
+                    await query.create_speciality(uow.session, title=speciality)
+                # add doctor with all the specialities to the db
                 await query.create_doctor(
+                    uow.session,
                     full_name=data['name'],
                     photo=data['photo'],
                     description=data['description'],
-                    speciality_title=speciality,
+                    prices=dict(zip(data['specialities'], data['price'])),
                     experience=data['experience'],
                     science_degree=data['science_degree'],
-                    qual_category=data['qual_category'],
-                    price=data['price'][data['specialities'].index(speciality)]
+                    qual_category=data['qual_category']
                 )
-            # log the doctor creation
-            logger.info(
-                f'admin {user_uid} created doctor "{data["name"]}" with specialities "{", ".join(data["specialities"])}"')
+            # it is needed to update cache if new specialities were created
+            cache_update_required = uow.committed and len(new_specialities) != 0
+            if uow.committed:
+                # switch readers to the new catalogue version
+                await catalogue.update_catalogue()
+                # log the specialities and doctor creation
+                for speciality in new_specialities:
+                    logger.info(f'admin {user_uid} created speciality "{speciality}"')
+                logger.info(
+                    f'admin {user_uid} created doctor "{data["name"]}" '
+                    f'with specialities "{", ".join(data["specialities"])}"')
             # delete message (because it's impossible to edit messages when you need to unpin photo)
             await bot.delete_message(
                 chat_id=user_uid,
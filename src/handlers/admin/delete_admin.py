@@ -15,8 +15,8 @@ from src.keyboards import (
     admins_config_menu, show_admins, confirmation_menu,
     admin_panel_menu, main_menu_client, back_to_menu
 )
-from src.keyboards.navigation import check_access
-from src.utils.cache import get_cache, update_cache
+from src.keyboards.navigation import admin_roles, privilege_roles
+from src.utils.cache import update_cache
 from src.utils.misc import logger
 
 
@@ -26,7 +26,7 @@ class FSMDeleteAdmin(StatesGroup):
     confirmation = State()
 
 
-async def delete_admin(callback_query: types.CallbackQuery, state: FSMContext):
+async def delete_admin(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
     admins: List[Any]
@@ -36,7 +36,7 @@ async def delete_admin(callback_query: types.CallbackQuery, state: FSMContext):
     # get user uid
     user_uid = callback_query.from_user.id
     # check user access
-    if await check_access(user_uid=user_uid):
+    if role in privilege_roles:
         # get admins basing on the current admin type
         admins = await query.get_admins() if user_uid == MASTER_ADMIN \
             else await query.get_admins(privilege_type=AdminPrivilegeType.low.value)
@@ -109,15 +109,14 @@ async def get_admins(callback_query: types.CallbackQuery, state: FSMContext):
     return
 
 
-async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext):
+async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
 
     # get user uid
     user_uid = callback_query.from_user.id
     # check user access
-    if await check_access(user_uid=user_uid):
+    if role in privilege_roles:
         async with state.proxy() as data:
             for uid, name in data['chosen_admins'].items():
                 # delete admin
@@ -129,7 +128,7 @@ async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContex
         # set pause (give time to read)
         await asyncio.sleep(2)
         # update admins in cache
-        await update_cache(CacheKeys.admins.value, CacheKeys.priv_admins.value)
+        await update_cache(CacheKeys.roles.value)
         # move back to menu
         await callback_query.message.edit_text(
             text=BotMessageText.menu_desc(),
@@ -137,8 +136,6 @@ async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContex
             reply_markup=admins_config_menu
         )
     else:
-        # get admins
-        admins = await get_cache(key=CacheKeys.admins.value)
         # send warning that user doesn't have enough privileges
         await callback_query.message.edit_text(text=BotMessageText.lack_of_privileges.value)
         # set pause (give time to read)
@@ -147,7 +144,7 @@ async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContex
         await callback_query.message.edit_text(
             text=BotMessageText.menu_desc(),
             parse_mode='HTML',
-            reply_markup=admin_panel_menu if user_uid in admins else main_menu_client
+            reply_markup=admin_panel_menu if role in admin_roles else main_menu_client
         )
     # exit FSM
     await state.finish()
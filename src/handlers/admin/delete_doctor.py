@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, Dict, List
 import os
 
 from aiogram import types, Dispatcher
@@ -7,13 +7,15 @@ from aiogram.dispatcher.filters.state import State, StatesGroup
 import asyncio
 
 from src.core.enums import CallbackData, BotMessageText, Symbols, CacheKeys
-from src.core.secrets import MASTER_ADMIN, PHOTO_GALLERY_PATH, PHOTO_EXTENSION
+from src.core.secrets import PHOTO_GALLERY_PATH, PHOTO_EXTENSION
 from src.db import query
+from src.db.session import UnitOfWork
 from src.keyboards import (
     doctors_settings_menu, confirmation_menu,
     show_doctors, back_to_menu, main_menu_client,
 )
-from src.utils.cache import get_cache, update_cache
+from src.keyboards.navigation import admin_roles
+from src.utils.cache import catalogue, update_cache
 from src.utils.misc import logger
 
 
@@ -23,22 +25,19 @@ class FSMDeleteDoctor(StatesGroup):
     confirmation = State()
 
 
-async def delete_doctor(callback_query: types.CallbackQuery, state: FSMContext):
+async def delete_doctor(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
     doctors: List[Any]
 
     # exit FSM (if not finished)
     await state.finish()
     # get user uid
     user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user status (admin or not)
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         # get all the existing doctors
-        doctors = await query.get_doctors()
+        doctors = await catalogue.get_doctors()
         # set the first state (enter FSM)
         await FSMDeleteDoctor.doctors.set()
         async with state.proxy() as data:
@@ -49,6 +48,7 @@ async def delete_doctor(callback_query: types.CallbackQuery, state: FSMContext):
             data['doctors'], data['doctors_pool'], data['chosen_doctors'] = {}, {}, {}
             for uid, doctor in enumerate(doctors):
                 data['doctors'][str(uid)] = {}
+                data['doctors'][str(uid)]['id'] = doctor.id
                 data['doctors'][str(uid)]['name'] = doctor.full_name
                 data['doctors'][str(uid)]['photo'] = doctor.photo
                 data['doctors_pool'][str(uid)] = doctor.full_name
@@ -86,6 +86,7 @@ async def choose_doctors(callback_query: types.CallbackQuery, state: FSMContext)
             del data['chosen_doctors'][key]
         else:
             data['chosen_doctors'][key] = {}
+            data['chosen_doctors'][key]['id'] = data['doctors'][key]['id']
             data['chosen_doctors'][key]['name'] = data['doctors'][key]['name']
             data['chosen_doctors'][key]['photo'] = data['doctors'][key]['photo']
         # mark chosen doctor
@@ -114,48 +115,51 @@ async def get_doctors(callback_query: types.CallbackQuery, state: FSMContext):
     return
 
 
-async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext):
+async def get_confirmation(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
     cache_update_required: bool
     specialities: List[Any]
     doctors: List[Any]
-    specialities_array: List[str]
+    doctor_specialities: Dict[str, List[str]]
+    deleted_specialities: List[str]
 
     # get user uid
     user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user status (admin or not)
-    if user_uid == MASTER_ADMIN or user_uid in admins:
-        # set the flag to understand if it is needed to update cache
-        cache_update_required = False
+    if role in admin_roles:
         async with state.proxy() as data:
-            for uid, info in data['chosen_doctors'].items():
-                # get specialities that doctor has
-                specialities = await query.get_doctor_specialities(photo=info['photo'])
-                # delete doctor
-                await query.delete_doctor(photo=info['photo'])
-                specialities_array = []
-                for speciality in specialities:
-                    specialities_array.append(speciality.title)
-                # log the doctor deletion
-                logger.info(f'admin {user_uid} deleted doctor "{info["name"]}" '
-                            f'with specialities "{", ".join(specialities_array)}"')
-                # delete photo from the gallery
-                os.remove(PHOTO_GALLERY_PATH + info['photo'] + PHOTO_EXTENSION)
-                for speciality in specialities:
-                    # get all the doctors for the speciality
-                    doctors = await query.get_doctors_by_speciality(id=speciality.id)
-                    # check if there are any doctors left
-                    if len(doctors) == 0:
-                        # delete speciality if there is no doctors left
-                        await query.delete_speciality(speciality_id=speciality.id)
-                        # log the speciality deletion
-                        logger.info(f'admin {user_uid} deleted speciality "{speciality.title}"')
-                        # change flag
-                        cache_update_required = True
+            # delete doctors and the specialities left without doctors in one transaction
+            doctor_specialities, deleted_specialities = {}, []
+            async with UnitOfWork() as uow:
+                for uid, info in data['chosen_doctors'].items():
+                    # get specialities that doctor has
+                    specialities = await query.get_doctor_specialities(uow.session, doctor_id=info['id'])
+                    doctor_specialities[uid] = [speciality.title for speciality in specialities]
+                    # delete doctor
+                    await query.delete_doctor(uow.session, doctor_id=info['id'])
+                    for speciality in specialities:
+                        # get all the doctors for the speciality
+                        doctors = await query.get_doctors_by_speciality(uow.session, id=speciality.id)
+                        # check if there are any doctors left
+                        if len(doctors) == 0:
+                            # delete speciality if there is no doctors left
+                            await query.delete_speciality(uow.session, speciality_id=speciality.id)
+                            deleted_specialities.append(speciality.title)
+            # it is needed to update cache if specialities were deleted
+            cache_update_required = uow.committed and len(deleted_specialities) != 0
+            if uow.committed:
+                for uid, info in data['chosen_doctors'].items():
+                    # log the doctor deletion
+                    logger.info(f'admin {user_uid} deleted doctor "{info["name"]}" '
+                                f'with specialities "{", ".join(doctor_specialities[uid])}"')
+                    # delete photo from the gallery
+                    os.remove(PHOTO_GALLERY_PATH + info['photo'] + PHOTO_EXTENSION)
+                for speciality in deleted_specialities:
+                    # log the speciality deletion
+                    logger.info(f'admin {user_uid} deleted speciality "{speciality}"')
+                # switch readers to the new catalogue version
+                await catalogue.update_catalogue()
         # send the "success message"
         await callback_query.message.edit_text(text=BotMessageText.successful_doctors_deletion.value)
         # set pause (give time to read)
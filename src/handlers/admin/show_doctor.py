@@ -1,4 +1,3 @@
-from ast import literal_eval
 from typing import List, Any
 
 from aiogram import types, Dispatcher
@@ -6,11 +5,11 @@ from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 
 from src.core.config import bot
-from src.core.enums import CallbackData, BotMessageText, Symbols, CacheKeys
-from src.core.secrets import MASTER_ADMIN, PHOTO_GALLERY_PATH, PHOTO_EXTENSION
-from src.db import query
+from src.core.enums import CallbackData, BotMessageText, Symbols
+from src.core.secrets import PHOTO_GALLERY_PATH, PHOTO_EXTENSION
 from src.keyboards import show_doctors, doctor_card, back_to_menu
-from src.utils.cache import get_cache
+from src.keyboards.navigation import admin_roles
+from src.utils.cache import catalogue
 
 
 # define finite-state machine
@@ -18,22 +17,16 @@ class FSMShowDoctor(StatesGroup):
     doctor = State()
 
 
-async def show_doctor(callback_query: types.CallbackQuery, state: FSMContext):
+async def show_doctor(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
-    user_uid: int
-    admins: List[int]
     doctors: List[Any]
 
     # exit FSM (if not finished)
     await state.finish()
-    # get user uid
-    user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user status (admin or not)
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         # get all the existing doctors
-        doctors = await query.get_doctors()
+        doctors = await catalogue.get_doctors()
         # set the first state (enter FSM)
         await FSMShowDoctor.doctor.set()
         async with state.proxy() as data:
@@ -77,17 +70,18 @@ async def get_doctor(callback_query: types.CallbackQuery, state: FSMContext):
     key = callback_query.data.split(Symbols.separator.value)[1]
     async with state.proxy() as data:
         # get doctor info
-        doctor = await query.get_doctor_by_photo(photo=data['doctors'][key]['photo'])
+        doctor = await catalogue.get_doctor_by_photo(photo=data['doctors'][key]['photo'])
         data['chosen_doctor'] = {}
+        data['chosen_doctor'][CallbackData.id.value] = doctor.id
         data['chosen_doctor'][CallbackData.full_name.value] = doctor.full_name
         data['chosen_doctor'][CallbackData.photo.value] = doctor.photo
         data['chosen_doctor'][CallbackData.description.value] = doctor.description
-        data['chosen_doctor'][CallbackData.speciality_id.value] = literal_eval(doctor.speciality_id)
-        data['chosen_doctor'][CallbackData.speciality.value] = literal_eval(doctor.speciality)
+        data['chosen_doctor'][CallbackData.speciality_id.value] = list(doctor.speciality_id)
+        data['chosen_doctor'][CallbackData.speciality.value] = list(doctor.speciality)
         data['chosen_doctor'][CallbackData.experience.value] = doctor.experience
         data['chosen_doctor'][CallbackData.science_degree.value] = doctor.science_degree
         data['chosen_doctor'][CallbackData.qual_category.value] = doctor.qual_category
-        data['chosen_doctor'][CallbackData.price.value] = literal_eval(doctor.price)
+        data['chosen_doctor'][CallbackData.price.value] = list(doctor.price)
         # delete message (because it's impossible to edit messages when you need to attach photo)
         await bot.delete_message(
             chat_id=data['user_uid'],
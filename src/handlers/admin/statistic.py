@@ -1,7 +1,6 @@
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from itertools import zip_longest
-from typing import Any, Dict, List, Union, Tuple
+from typing import Any, Dict, List, Optional, Union, Tuple
 import re
 
 from aiogram import types, Dispatcher
@@ -15,9 +14,11 @@ from src.core.enums import (
 )
 from src.db.base import Base
 from src.db.models import Appointment, CallBack, Feedback, User
-from src.db.query import calculate_statistic
+from src.db.counters import counters, floor_hour
+from src.db.query import calculate_statistics
+from src.db.rollup import sources
 from src.keyboards import back_to_menu
-from src.keyboards.navigation import check_access
+from src.keyboards.navigation import privilege_roles
 
 timedelta: Dict[str, relativedelta] = {
     CallbackData.day.value: relativedelta(hours=24),
@@ -26,6 +27,8 @@ timedelta: Dict[str, relativedelta] = {
     CallbackData.quarter.value: relativedelta(months=3),
     CallbackData.year.value: relativedelta(years=1)
 }
+# periods which statistic is taken from live counters
+live_periods: Tuple[str, str] = (CallbackData.day.value, CallbackData.week.value)
 
 
 # define finite-state machine
@@ -33,7 +36,7 @@ class FSMStatistics(StatesGroup):
     period = State()
 
 
-async def show_standard_statistics(callback_query: types.CallbackQuery):
+async def show_standard_statistics(callback_query: types.CallbackQuery, role: str):
     # annotation
     period_type: str
     end_date: datetime
@@ -43,7 +46,7 @@ async def show_standard_statistics(callback_query: types.CallbackQuery):
     stats: Dict[Base, Any]
 
     # check user access
-    if await check_access(user_uid=callback_query.from_user.id):
+    if role in privilege_roles:
         # get the period type
         period_type = callback_query.data.split(Symbols.separator.value)[1]
         # get the current time
@@ -58,7 +61,8 @@ async def show_standard_statistics(callback_query: types.CallbackQuery):
             start_date=start_date,
             end_date=end_date,
             start_date_prev=start_date_prev,
-            change=True
+            change=True,
+            live=period_type in live_periods
         )
         # show statistics for the specified period
         await bot.edit_message_text(
@@ -90,11 +94,11 @@ async def show_standard_statistics(callback_query: types.CallbackQuery):
     return
 
 
-async def show_custom_statistics(callback_query: types.CallbackQuery, state: FSMContext):
+async def show_custom_statistics(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # exit FSM (if not finished)
     await state.finish()
     # check user access
-    if await check_access(user_uid=callback_query.from_user.id):
+    if role in privilege_roles:
         # ask to enter the period
         await callback_query.message.edit_text(
             text=BotMessageText.ask_period.value,
@@ -179,26 +183,37 @@ async def get_period(message: types.Message, state: FSMContext):
 
 
 async def get_statistic(start_date: datetime, end_date: datetime, start_date_prev: Union[str, datetime] = None,
-                        change: bool = False) -> Dict[Base, Any]:
+                        change: bool = False, live: bool = False) -> Dict[Base, Any]:
     # annotation
-    tables: Tuple[Base, Base, Base, Base, Base]
-    cons_types: Tuple[str, str]
+    counts: Optional[Dict[Tuple[Base, Optional[str]], Tuple[int, int]]]
     result: Dict[Base, Any]
     statistic: int
+    statistic_prev: int
     statistic_change: Union[float, int]
 
-    # specify tables to calculate statistics (do not change the sequence)
-    tables = (Appointment, Appointment, CallBack, Feedback, User)
-    cons_types = (ConsultationType.online.value, ConsultationType.offline.value)
-    result = {table: {} for table in set(tables)}
-    for table, cons_type in zip_longest(tables, cons_types):
-        # calculate statistic for chosen period
-        statistic = await calculate_statistic(
-            table=table,
+    # get statistic of short periods from live counters (if they cover the periods)
+    counts = None
+    if live:
+        # align periods to whole hours, so counters and db count the same rows
+        start_date = floor_hour(start_date)
+        start_date_prev = floor_hour(start_date_prev) if start_date_prev else None
+        counts = await counters.get(
+            sources=sources,
+            start_date=start_date,
+            end_date=end_date,
+            start_date_prev=start_date_prev if change else None
+        )
+    # calculate statistic for chosen (and previous) period
+    if counts is None:
+        counts = await calculate_statistics(
+            sources=sources,
             start_date=start_date,
             end_date=end_date,
-            consultation_type=cons_type
+            start_date_prev=start_date_prev if change else None
         )
+    result = {table: {} for table, _ in sources}
+    for table, cons_type in sources:
+        statistic, statistic_prev = counts[(table, cons_type)]
         # check table and save the result
         if table == Appointment:
             result[table][cons_type] = {Statistic.statistic.value: statistic}
@@ -210,12 +225,7 @@ async def get_statistic(start_date: datetime, end_date: datetime, start_date_pre
             if table != Feedback:
                 # calculate statistic change comparing with previous period
                 try:
-                    statistic_change = statistic / await calculate_statistic(
-                        table=table,
-                        start_date=start_date_prev,
-                        end_date=start_date,
-                        consultation_type=cons_type
-                    ) * 100 - 100
+                    statistic_change = statistic / statistic_prev * 100 - 100
                 except ZeroDivisionError:
                     statistic_change = 0.0 if statistic == 0 else 100
                 else:
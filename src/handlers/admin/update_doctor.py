@@ -1,4 +1,3 @@
-from ast import literal_eval
 from typing import Dict, List, Any, Optional, Union
 
 from aiogram import types, Dispatcher
@@ -8,19 +7,21 @@ from aiogram.types import InlineKeyboardMarkup
 import asyncio
 
 from src.core.config import bot
-from src.core.secrets import MASTER_ADMIN, PHOTO_GALLERY_PATH, PHOTO_EXTENSION
+from src.core.secrets import PHOTO_GALLERY_PATH, PHOTO_EXTENSION
 from src.core.enums import CallbackData, BotMessageText, Symbols, CacheKeys
 from src.core.processing import transform_name, process_input
 from src.core.validation import check_integer
 from src.db import query
 from src.db.models import Speciality
+from src.db.session import UnitOfWork, get_async_session
 from src.handlers.admin.show_doctor import FSMShowDoctor
 from src.keyboards import (
     science_degrees_list, doctor_info_sections, specialities_config,
     main_menu_client, qual_categories_list, show_specialities,
     change_info, show_doc_specialities, back_to_menu, show_doctors
 )
-from src.utils.cache import get_cache, update_cache
+from src.keyboards.navigation import admin_roles
+from src.utils.cache import catalogue, update_cache
 from src.utils.misc import logger
 
 # this dict is used to understand what message text to send basing on update section (update doctor)
@@ -56,22 +57,16 @@ class FSMUpdateDoctor(StatesGroup):
     price = State()
 
 
-async def update_doctor(callback_query: types.CallbackQuery, state: FSMContext):
+async def update_doctor(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
-    user_uid: int
-    admins: List[int]
     doctors: List[Any]
 
     # exit FSM (if not finished)
     await state.finish()
-    # get user uid
-    user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user status (admin or not)
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         # get all the existing doctors
-        doctors = await query.get_doctors()
+        doctors = await catalogue.get_doctors()
         # set the first state (enter FSM)
         await FSMUpdateDoctor.doctor.set()
         async with state.proxy() as data:
@@ -120,18 +115,19 @@ async def get_doctor(callback_query: types.CallbackQuery, state: FSMContext):
             # get doctor key
             key = callback_query.data.split(Symbols.separator.value)[1]
             # get doctor info
-            doctor = await query.get_doctor_by_photo(photo=data['doctors'][key]['photo'])
+            doctor = await catalogue.get_doctor_by_photo(photo=data['doctors'][key]['photo'])
             # save obtained answer into FSM memory
             data['chosen_doctor'] = {}
+            data['chosen_doctor'][CallbackData.id.value] = doctor.id
             data['chosen_doctor'][CallbackData.full_name.value] = doctor.full_name
             data['chosen_doctor'][CallbackData.photo.value] = doctor.photo
             data['chosen_doctor'][CallbackData.description.value] = doctor.description
-            data['chosen_doctor'][CallbackData.speciality_id.value] = literal_eval(doctor.speciality_id)
-            data['chosen_doctor'][CallbackData.speciality.value] = literal_eval(doctor.speciality)
+            data['chosen_doctor'][CallbackData.speciality_id.value] = list(doctor.speciality_id)
+            data['chosen_doctor'][CallbackData.speciality.value] = list(doctor.speciality)
             data['chosen_doctor'][CallbackData.experience.value] = doctor.experience
             data['chosen_doctor'][CallbackData.science_degree.value] = doctor.science_degree
             data['chosen_doctor'][CallbackData.qual_category.value] = doctor.qual_category
-            data['chosen_doctor'][CallbackData.price.value] = literal_eval(doctor.price)
+            data['chosen_doctor'][CallbackData.price.value] = list(doctor.price)
         # check state
         if await state.get_state() == FSMShowDoctor.doctor.state:
             # delete message (because it's impossible to edit messages when you need to unpin photo)
@@ -268,19 +264,16 @@ in order to make code more readable and exclude complicated if-else logic
 """
 
 
-async def get_new_value_photo(message: types.Message, state: FSMContext):
+async def get_new_value_photo(message: types.Message, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
 
     # get user uid
     user_uid = message.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # delete answer
     await message.delete()
     # check user access
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         async with state.proxy() as data:
             # check section
             if data['section'] != CallbackData.photo.value:
@@ -347,38 +340,40 @@ async def get_new_value_photo(message: types.Message, state: FSMContext):
     return
 
 
-async def get_new_value_cb(callback_query: types.CallbackQuery, state: FSMContext):
+async def get_new_value_cb(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
     callback_data: str
     new_value: Optional[str]
 
     # get user uid
     user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user access
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         # get admin choice
         callback_data = callback_query.data.split(Symbols.separator.value)[1]
         # identify choice
         new_value = None if callback_data == CallbackData.no_specification.value else callback_data
         async with state.proxy() as data:
             # update info
-            await query.update_doctor(
-                photo=data['chosen_doctor'][CallbackData.photo.value],
-                column=data['section'],
-                value=new_value
-            )
-            # log data update
-            logger.info(
-                f'admin {user_uid} changed "{data["section"]}" '
-                f'of specialist "{data["chosen_doctor"][CallbackData.full_name.value]}" '
-                f'from "{data["chosen_doctor"][data["section"]]}" to "{new_value}"'
-            )
-            # update value in the FSM memory
-            data['chosen_doctor'][data['section']] = new_value
+            async with UnitOfWork() as uow:
+                await query.update_doctor(
+                    uow.session,
+                    doctor_id=data['chosen_doctor'][CallbackData.id.value],
+                    column=data['section'],
+                    value=new_value
+                )
+            if uow.committed:
+                # switch readers to the new catalogue version
+                await catalogue.update_catalogue()
+                # log data update
+                logger.info(
+                    f'admin {user_uid} changed "{data["section"]}" '
+                    f'of specialist "{data["chosen_doctor"][CallbackData.full_name.value]}" '
+                    f'from "{data["chosen_doctor"][data["section"]]}" to "{new_value}"'
+                )
+                # update value in the FSM memory
+                data['chosen_doctor'][data['section']] = new_value
             # send the "success message"
             await bot.edit_message_text(
                 chat_id=user_uid,
@@ -416,10 +411,9 @@ async def get_new_value_cb(callback_query: types.CallbackQuery, state: FSMContex
     return
 
 
-async def get_new_value_msg(message: types.Message, state: FSMContext):
+async def get_new_value_msg(message: types.Message, state: FSMContext, role: str):
     # annotation
     user_uid: int
-    admins: List[int]
     name: List[str]
     new_value: Union[int, str]
     speciality_id: Optional[int]
@@ -430,10 +424,8 @@ async def get_new_value_msg(message: types.Message, state: FSMContext):
 
     # get user uid
     user_uid = message.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # check user access
-    if user_uid == MASTER_ADMIN or user_uid in admins:
+    if role in admin_roles:
         async with state.proxy() as data:
             # check section and process input
             if data['section'] == CallbackData.full_name.value:
@@ -492,25 +484,33 @@ async def get_new_value_msg(message: types.Message, state: FSMContext):
                     ids=data['chosen_doctor'][CallbackData.speciality_id.value]
                 )
             # update info
-            await query.update_doctor(
-                photo=data['chosen_doctor'][CallbackData.photo.value],
-                column=data['section'],
-                value=new_value,
-                speciality_id=speciality_id
-            )
-            # log data update
-            logger.info(
-                f'admin {user_uid} changed "{data["section"]}" '
-                f'of specialist "{data["chosen_doctor"][CallbackData.full_name.value]}" '
-                f'{log_speciality}from "{log_prev_value}" to "{new_value}"'
-            )
-            # update value in the FSM memory and change state
+            async with UnitOfWork() as uow:
+                await query.update_doctor(
+                    uow.session,
+                    doctor_id=data['chosen_doctor'][CallbackData.id.value],
+                    column=data['section'],
+                    value=new_value,
+                    speciality_id=speciality_id
+                )
+            if uow.committed:
+                # switch readers to the new catalogue version
+                await catalogue.update_catalogue()
+                # log data update
+                logger.info(
+                    f'admin {user_uid} changed "{data["section"]}" '
+                    f'of specialist "{data["chosen_doctor"][CallbackData.full_name.value]}" '
+                    f'{log_speciality}from "{log_prev_value}" to "{new_value}"'
+                )
+                # update value in the FSM memory
+                if data['section'] != CallbackData.price.value:
+                    data['chosen_doctor'][data['section']] = new_value
+                else:
+                    data['chosen_doctor'][data['section']][data['index']] = new_value
+            # change state
             if data['section'] != CallbackData.price.value:
-                data['chosen_doctor'][data['section']] = new_value
                 # set bot to the section state
                 await FSMUpdateDoctor.section.set()
             else:
-                data['chosen_doctor'][data['section']][data['index']] = new_value
                 # set bot to the speciality state
                 await FSMUpdateDoctor.speciality.set()
             # send the "success message"
@@ -580,10 +580,11 @@ async def get_action(callback_query: types.CallbackQuery, state: FSMContext):
     async with state.proxy() as data:
         # check chosen action
         if callback_query.data == CallbackData.add_specialities.value:
-            # get all the existing specialities
-            specialities = await query.get_specialities()
-            for item in data['chosen_doctor'][CallbackData.speciality.value]:
-                specialities.remove(item)
+            # get all the existing specialities except the doctor ones (none if the db is unavailable)
+            specialities = [
+                speciality for speciality in await query.get_specialities() or []
+                if speciality not in data['chosen_doctor'][CallbackData.speciality.value]
+            ]
             # create dictionary to optimize callback_data
             data['specialities_pool'] = dict(enumerate(specialities))
             data['specialities'], data['messages_to_del'] = [], []
@@ -600,8 +601,13 @@ async def get_action(callback_query: types.CallbackQuery, state: FSMContext):
                 )
             )
         else:
-            # get all the doctor specialities
-            specialities = await query.get_doctor_specialities(photo=data['chosen_doctor'][CallbackData.photo.value])
+            # get all the doctor specialities (none if the db is unavailable)
+            specialities = []
+            async with get_async_session() as session:
+                specialities = await query.get_doctor_specialities(
+                    session,
+                    doctor_id=data['chosen_doctor'][CallbackData.id.value]
+                )
             # create dictionary to optimize callback_data
             data['specialities_pool'] = {speciality.id: speciality.title for speciality in specialities}
             data['specialities'] = []
@@ -689,10 +695,10 @@ async def get_new_specialities(message: types.Message, state: FSMContext):
     return
 
 
-async def update_specialities(callback_query: types.CallbackQuery, state: FSMContext):
+async def update_specialities(callback_query: types.CallbackQuery, state: FSMContext, role: str):
     # annotation
-    admins: List[int]
     cache_update_required: bool
+    deleted_specialities: List[str]
     speciality_id: int
     index: int
     doctors: List[Any]
@@ -743,39 +749,45 @@ async def update_specialities(callback_query: types.CallbackQuery, state: FSMCon
                 # exit function
                 return
             else:
-                # get admins
-                admins = await get_cache(key=CacheKeys.admins.value)
                 # check user access
-                if data['user_uid'] == MASTER_ADMIN or data['user_uid'] in admins:
-                    # set the flag to understand if it is needed to update cache
-                    cache_update_required = False
-                    for speciality in data['specialities']:
-                        # get speciality id
-                        speciality_id = list(data['specialities_pool'].keys())[
-                            list(data['specialities_pool'].values()).index(speciality)]
-                        # delete doctor with specified speciality
-                        await query.delete_doctor(
-                            photo=data['chosen_doctor'][CallbackData.photo.value],
-                            speciality_id=int(speciality_id)
-                        )
-                        # update values in the FSM memory
-                        index = data['chosen_doctor'][data['section']].index(speciality)
-                        data['chosen_doctor'][data['section']].remove(speciality)
-                        data['chosen_doctor'][CallbackData.speciality_id.value].remove(int(speciality_id))
-                        del data['chosen_doctor'][CallbackData.price.value][index]
-                        # get all the doctors for the speciality
-                        doctors = await query.get_doctors_by_speciality(id=int(speciality_id))
-                        # check if there are any doctors left
-                        if len(doctors) == 0:
-                            # delete speciality if there is no doctors left
-                            await query.delete_speciality(speciality_id=int(speciality_id))
+                if role in admin_roles:
+                    # delete doctor specialities and the specialities left without doctors in one transaction
+                    deleted_specialities = []
+                    async with UnitOfWork() as uow:
+                        for speciality in data['specialities']:
+                            # get speciality id
+                            speciality_id = list(data['specialities_pool'].keys())[
+                                list(data['specialities_pool'].values()).index(speciality)]
+                            # delete doctor speciality
+                            await query.delete_doctor(
+                                uow.session,
+                                doctor_id=data['chosen_doctor'][CallbackData.id.value],
+                                speciality_id=int(speciality_id)
+                            )
+                            # get all the doctors for the speciality
+                            doctors = await query.get_doctors_by_speciality(uow.session, id=int(speciality_id))
+                            # check if there are any doctors left
+                            if len(doctors) == 0:
+                                # delete speciality if there is no doctors left
+                                await query.delete_speciality(uow.session, speciality_id=int(speciality_id))
+                                deleted_specialities.append(speciality)
+                    # it is needed to update cache if specialities were deleted
+                    cache_update_required = uow.committed and len(deleted_specialities) != 0
+                    if uow.committed:
+                        for speciality in data['specialities']:
+                            # update values in the FSM memory
+                            index = data['chosen_doctor'][data['section']].index(speciality)
+                            del data['chosen_doctor'][data['section']][index]
+                            del data['chosen_doctor'][CallbackData.speciality_id.value][index]
+                            del data['chosen_doctor'][CallbackData.price.value][index]
+                        for speciality in deleted_specialities:
                             # log the speciality deletion
                             logger.info(f'admin {data["user_uid"]} deleted speciality "{speciality}"')
-                            # change flag
-                            cache_update_required = True
-                    # log the specialities deletion
-                    logger.info(f'admin {data["user_uid"]} deleted specialities "{", ".join(data["specialities"])}" '
-                                f'from doctor "{data["chosen_doctor"][CallbackData.full_name.value]}"')
+                        # switch readers to the new catalogue version
+                        await catalogue.update_catalogue()
+                        # log the specialities deletion
+                        logger.info(f'admin {data["user_uid"]} deleted specialities "{", ".join(data["specialities"])}" '
+                                    f'from doctor "{data["chosen_doctor"][CallbackData.full_name.value]}"')
                     # delete used keys
                     del data['specialities'], data['specialities_pool']
                     # send the "success message"
@@ -816,9 +828,9 @@ async def update_specialities(callback_query: types.CallbackQuery, state: FSMCon
     return
 
 
-async def get_price(message: types.Message, state: FSMContext):
+async def get_price(message: types.Message, state: FSMContext, role: str):
     # annotation
-    admins: List[int]
+    new_specialities: List[str]
     cache_update_required: bool
     res: Speciality
 
@@ -861,51 +873,48 @@ async def get_price(message: types.Message, state: FSMContext):
                 # exit function
                 return
             else:
-                # get admins
-                admins = await get_cache(key=CacheKeys.admins.value)
                 # check user access
-                if data['user_uid'] == MASTER_ADMIN or data['user_uid'] in admins:
+                if role in admin_roles:
                     # delete used key
                     del data['no_price']
                     # create empty array to store specialities id
                     data['speciality_id'] = []
-                    # set the flag to understand if it is needed to update cache
-                    cache_update_required = False
-                    for speciality in data['specialities']:
-                        # check if speciality is new
-                        if speciality not in data['specialities_pool'].values():
-                            # create speciality
-                            res = await query.create_speciality(title=speciality)
+                    # create new specialities and add specialities to the doctor in one transaction
+                    new_specialities = []
+                    async with UnitOfWork() as uow:
+                        for speciality in data['specialities']:
+                            # check if speciality is new
+                            if speciality not in data['specialities_pool'].values():
+                                # create speciality
+                                res = await query.create_speciality(uow.session, title=speciality)
+                                new_specialities.append(speciality)
+                            else:
+                                # get speciality to obtain id
+                                res = await query.get_speciality_by_title(uow.session, title=speciality)
                             # save speciality id
                             data['speciality_id'].append(res.id)
+                        # add specialities to the doctor
+                        await query.add_doctor_specialities(
+                            uow.session,
+                            doctor_id=data['chosen_doctor'][CallbackData.id.value],
+                            prices=dict(zip(data['speciality_id'], data['price']))
+                        )
+                    # it is needed to update cache if new specialities were created
+                    cache_update_required = uow.committed and len(new_specialities) != 0
+                    if uow.committed:
+                        for speciality in new_specialities:
                             # log the speciality creation
                             logger.info(f'admin {data["user_uid"]} created speciality "{speciality}"')
-                            # change flag
-                            cache_update_required = True
-                        else:
-                            # get speciality to obtain id
-                            res = await query.get_speciality_by_title(title=speciality)
-                            # save speciality id
-                            data['speciality_id'].append(res.id)
-                        # add doctor to the db
-                        await query.create_doctor(
-                            full_name=data['chosen_doctor'][CallbackData.full_name.value],
-                            photo=data['chosen_doctor'][CallbackData.photo.value],
-                            description=data['chosen_doctor'][CallbackData.description.value],
-                            speciality_title=speciality,
-                            experience=data['chosen_doctor'][CallbackData.experience.value],
-                            science_degree=data['chosen_doctor'][CallbackData.science_degree.value],
-                            qual_category=data['chosen_doctor'][CallbackData.qual_category.value],
-                            price=data['price'][data['specialities'].index(speciality)]
-                        )
-                    # log the speciality addition
-                    logger.info(
-                        f'admin {data["user_uid"]} added specialities "{", ".join(data["specialities"])}" '
-                        f'to doctor "{data["chosen_doctor"][CallbackData.full_name.value]}"')
-                    # update values in the FSM memory
-                    data['chosen_doctor'][data['section']] += data['specialities']
-                    data['chosen_doctor'][CallbackData.price.value] += data['price']
-                    data['chosen_doctor'][CallbackData.speciality_id.value] += data['speciality_id']
+                        # switch readers to the new catalogue version
+                        await catalogue.update_catalogue()
+                        # log the speciality addition
+                        logger.info(
+                            f'admin {data["user_uid"]} added specialities "{", ".join(data["specialities"])}" '
+                            f'to doctor "{data["chosen_doctor"][CallbackData.full_name.value]}"')
+                        # update values in the FSM memory
+                        data['chosen_doctor'][data['section']] += data['specialities']
+                        data['chosen_doctor'][CallbackData.price.value] += data['price']
+                        data['chosen_doctor'][CallbackData.speciality_id.value] += data['speciality_id']
                     # delete used keys
                     del data['specialities'], data['specialities_pool'], data['speciality_id']
                     # send the "success message"
@@ -14,13 +14,11 @@ from src.core.enums import (
 )
 from src.core.processing import process_input, standardize_phone
 from src.core.secrets import (
-    CHAT_ID, MASTER_ADMIN, YOOKASSA_TOKEN,
+    CHAT_ID, YOOKASSA_TOKEN,
     PHOTO_GALLERY_PATH, PHOTO_EXTENSION
 )
 from src.core.validation import check_phone
-from src.db.query import (
-    create_appointment, get_doctors_by_speciality, get_price
-)
+from src.db.writer import create_appointment
 from src.keyboards import (
     consultation_type, share_contact, communication_type,
     choose_doctor, generate_speciality_buttons, payment,
@@ -28,7 +26,8 @@ from src.keyboards import (
     back_to_menu, main_menu_admin
 )
 from src.parsers import generate_link
-from src.utils.cache import get_cache
+from src.keyboards.navigation import admin_roles
+from src.utils.cache import get_cache, get_doctors_by_speciality, get_price
 
 
 # define finite-state machine
@@ -544,22 +543,16 @@ async def get_phone(message: types.Message, state: FSMContext):
     return
 
 
-async def get_name(message: types.Message, state: FSMContext):
+async def get_name(message: types.Message, state: FSMContext, role: str):
     # annotation
-    admins: List[int]
     bot_message: types.Message
     res: types.Message
+    saved: bool
 
     async with state.proxy() as data:
         # save obtained answer in the FSM memory
         data['name'] = ' '.join(process_input(string=message.text, delimiter=' '))
         data['request_message'] = BotMessageText.appointment_request(data)
-        # send request to the telegram group/channel with specified ID
-        res = await bot.send_message(
-            chat_id=CHAT_ID,
-            text=data['request_message'],
-            parse_mode='HTML'
-        )
         # edit message with question
         await bot.edit_message_reply_markup(
             chat_id=data['user_uid'],
@@ -569,7 +562,7 @@ async def get_name(message: types.Message, state: FSMContext):
         # check consultation type
         if data['consultation_type'] == ConsultationType.offline.value:
             # add new appointment to the db
-            await create_appointment(
+            saved = await create_appointment(
                 tg_uid=data['user_uid'],
                 username=data['username'],
                 full_name=data['name'],
@@ -580,48 +573,66 @@ async def get_name(message: types.Message, state: FSMContext):
                 doctor_id=data['doctor_id'],
                 preferable_dt=data['datetime']
             )
-            # send warning (in case of chat type and not None username)
-            if data['communication_type'] == CommunicationType.chat.value and not data['is_username_empty']:
-                # ask to hold username unchanged
+            if not saved:
+                # send the "failure message" (request can be sent again)
                 bot_message = await bot.send_message(
                     chat_id=data['user_uid'],
-                    text=BotMessageText.username_warning.value,
+                    text=BotMessageText.confirm_request_failure.value,
                     parse_mode='HTML'
                 )
                 # update message id
                 data['last_msg_id'] = bot_message.message_id
-                # set pause (give time to read)
-                await asyncio.sleep(6)
-                # send the "success message"
-                await bot.edit_message_text(
-                    chat_id=data['user_uid'],
-                    message_id=data['last_msg_id'],
-                    text=BotMessageText.confirm_request_success.value,
-                    parse_mode='HTML'
-                )
             else:
-                # send the "success message"
-                bot_message = await bot.send_message(
-                    chat_id=data['user_uid'],
-                    text=BotMessageText.confirm_request_success.value,
+                # send request to the telegram group/channel with specified ID
+                await bot.send_message(
+                    chat_id=CHAT_ID,
+                    text=data['request_message'],
                     parse_mode='HTML'
                 )
-                # update message id
-                data['last_msg_id'] = bot_message.message_id
+                # send warning (in case of chat type and not None username)
+                if data['communication_type'] == CommunicationType.chat.value and not data['is_username_empty']:
+                    # ask to hold username unchanged
+                    bot_message = await bot.send_message(
+                        chat_id=data['user_uid'],
+                        text=BotMessageText.username_warning.value,
+                        parse_mode='HTML'
+                    )
+                    # update message id
+                    data['last_msg_id'] = bot_message.message_id
+                    # set pause (give time to read)
+                    await asyncio.sleep(6)
+                    # send the "success message"
+                    await bot.edit_message_text(
+                        chat_id=data['user_uid'],
+                        message_id=data['last_msg_id'],
+                        text=BotMessageText.confirm_request_success.value,
+                        parse_mode='HTML'
+                    )
+                else:
+                    # send the "success message"
+                    bot_message = await bot.send_message(
+                        chat_id=data['user_uid'],
+                        text=BotMessageText.confirm_request_success.value,
+                        parse_mode='HTML'
+                    )
+                    # update message id
+                    data['last_msg_id'] = bot_message.message_id
             # set pause (give time to read)
             await asyncio.sleep(4)
-            # get admins
-            admins = await get_cache(key=CacheKeys.admins.value)
             # move back to menu
             await bot.send_message(
                 chat_id=data['user_uid'],
                 text=BotMessageText.menu_desc(),
                 parse_mode='HTML',
-                reply_markup=main_menu_admin if (
-                        data['user_uid'] in admins or data['user_uid'] == MASTER_ADMIN
-                ) else main_menu_client
+                reply_markup=main_menu_admin if role in admin_roles else main_menu_client
             )
         else:
+            # send request to the telegram group/channel with specified ID
+            res = await bot.send_message(
+                chat_id=CHAT_ID,
+                text=data['request_message'],
+                parse_mode='HTML'
+            )
             # save request message id for editing
             data['request_msg_id'] = res.message_id
             # set bot to the next state
@@ -696,6 +707,7 @@ async def process_pre_checkout_query(pre_checkout_query: types.PreCheckoutQuery,
 async def process_payment(message: types.Message, state: FSMContext):
     # annotation
     bot_message: types.Message
+    saved: bool
 
     # check the type of incoming payment
     if message.successful_payment.invoice_payload == Payment.appointment.value:
@@ -719,15 +731,8 @@ async def process_payment(message: types.Message, state: FSMContext):
             data['request_message'] += f'\n\n{Payment.transaction_code.value}' \
                                        f'{message.successful_payment.provider_payment_charge_id}\n' \
                                        f'{Payment.transaction_sum.value}{data["price"]} ₽'
-            # inform administrators that consultation is paid
-            await bot.edit_message_text(
-                chat_id=CHAT_ID,
-                message_id=data['request_msg_id'],
-                text=data['request_message'],
-                parse_mode='HTML'
-            )
             # add new appointment to the db
-            await create_appointment(
+            saved = await create_appointment(
                 tg_uid=data['user_uid'],
                 username=data['username'],
                 full_name=data['name'],
@@ -738,6 +743,16 @@ async def process_payment(message: types.Message, state: FSMContext):
                 doctor_id=data['doctor_id'],
                 preferable_dt=data['datetime']
             )
+            # warn administrators if paid appointment is not saved (client can't be asked to pay again)
+            if not saved:
+                data['request_message'] += f'\n\n{BotMessageText.request_not_saved.value}'
+            # inform administrators that consultation is paid
+            await bot.edit_message_text(
+                chat_id=CHAT_ID,
+                message_id=data['request_msg_id'],
+                text=data['request_message'],
+                parse_mode='HTML'
+            )
             # set bot to the next state
             await FSMAppointment.next()
             # generate link for video conference
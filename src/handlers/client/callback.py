@@ -1,4 +1,3 @@
-from typing import List
 import re
 
 from aiogram import types, Dispatcher
@@ -7,16 +6,16 @@ from aiogram.dispatcher.filters.state import State, StatesGroup
 import asyncio
 
 from src.core.config import bot
-from src.core.enums import BotMessageText, CallbackData, CacheKeys
+from src.core.enums import BotMessageText, CallbackData
 from src.core.processing import process_input, standardize_phone
-from src.core.secrets import CHAT_ID, MASTER_ADMIN
+from src.core.secrets import CHAT_ID
 from src.core.validation import check_phone
-from src.db.query import create_callback
+from src.db.writer import create_callback
 from src.keyboards import (
     share_contact, main_menu_client,
     back_to_menu, main_menu_admin
 )
-from src.utils.cache import get_cache
+from src.keyboards.navigation import admin_roles
 
 
 # define finite-state machine
@@ -75,10 +74,10 @@ async def get_name(message: types.Message, state: FSMContext):
     return
 
 
-async def get_phone(message: types.Message, state: FSMContext):
+async def get_phone(message: types.Message, state: FSMContext, role: str):
     # annotation
     clean_phone: str
-    admins: List[int]
+    saved: bool
 
     # process input leaving only numbers
     try:
@@ -111,23 +110,24 @@ async def get_phone(message: types.Message, state: FSMContext):
                 data['phone'] = message.contact.phone_number
             else:
                 data['phone'] = standardize_phone(clean_phone)
-            # send request to the telegram group/channel with specified ID
-            await bot.send_message(
-                chat_id=CHAT_ID,
-                text=BotMessageText.callback_request(data),
-                parse_mode='HTML'
-            )
             # add new callback to the db
-            await create_callback(
+            saved = await create_callback(
                 tg_uid=data['user_uid'],
                 username=message.from_user.username,
                 full_name=data['name'],
                 phone=data['phone']
             )
-            # send the "success message"
+            if saved:
+                # send request to the telegram group/channel with specified ID
+                await bot.send_message(
+                    chat_id=CHAT_ID,
+                    text=BotMessageText.callback_request(data),
+                    parse_mode='HTML'
+                )
+            # send the "success message" (or ask to send the request again)
             bot_message = await bot.send_message(
                 chat_id=data['user_uid'],
-                text=BotMessageText.confirm_request_success.value,
+                text=(BotMessageText.confirm_request_success if saved else BotMessageText.confirm_request_failure).value,
                 parse_mode='HTML',
                 reply_markup=types.ReplyKeyboardRemove()
             )
@@ -135,16 +135,12 @@ async def get_phone(message: types.Message, state: FSMContext):
             data['last_msg_id'] = bot_message.message_id
             # set pause (give time to read)
             await asyncio.sleep(4)
-            # get admins
-            admins = await get_cache(key=CacheKeys.admins.value)
             # move back to menu
             await bot.send_message(
                 chat_id=data['user_uid'],
                 text=BotMessageText.menu_desc(),
                 parse_mode='HTML',
-                reply_markup=main_menu_admin if (
-                        data['user_uid'] in admins or data['user_uid'] == MASTER_ADMIN
-                ) else main_menu_client
+                reply_markup=main_menu_admin if role in admin_roles else main_menu_client
             )
         # exit FSM
         await state.finish()
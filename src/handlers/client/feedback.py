@@ -1,16 +1,14 @@
-from typing import List
-
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 import asyncio
 
 from src.core.config import bot
-from src.core.enums import BotMessageText, CallbackData, CacheKeys
-from src.core.secrets import CHAT_ID, MASTER_ADMIN
-from src.db.query import create_feedback
+from src.core.enums import BotMessageText, CallbackData
+from src.core.secrets import CHAT_ID
+from src.db.writer import create_feedback
 from src.keyboards import main_menu_client, back_to_menu, main_menu_admin
-from src.utils.cache import get_cache
+from src.keyboards.navigation import admin_roles
 
 
 # define finite-state machine
@@ -37,53 +35,50 @@ async def leave_feedback(callback_query: types.CallbackQuery, state: FSMContext)
     return
 
 
-async def get_message(message: types.Message, state: FSMContext):
+async def get_message(message: types.Message, state: FSMContext, role: str):
     # annotation
-    admins: List[int]
+    saved: bool
 
     async with state.proxy() as data:
         # save obtained answer and user info in the FSM memory
         data['message'] = message.text
         data['username'] = message.from_user.username
         data['full_name'] = message.from_user.full_name
-        # send feedback to the group/channel with specified ID
-        await bot.send_message(
-            chat_id=CHAT_ID,
-            text=BotMessageText.feedback_request(details=data),
-            parse_mode='HTML'
-        )
         # add new feedback to the db
-        await create_feedback(
+        saved = await create_feedback(
             tg_uid=data['user_uid'],
             username=data['username'],
             message=data['message']
         )
+        if saved:
+            # send feedback to the group/channel with specified ID
+            await bot.send_message(
+                chat_id=CHAT_ID,
+                text=BotMessageText.feedback_request(details=data),
+                parse_mode='HTML'
+            )
         # remove reply_markup
         await bot.edit_message_reply_markup(
             chat_id=data['user_uid'],
             message_id=data['last_msg_id'],
             reply_markup=None
         )
-        # send the "success message"
+        # send the "success message" (or ask to send the feedback again)
         bot_message = await bot.send_message(
             chat_id=data['user_uid'],
-            text=BotMessageText.confirm_feedback_success.value,
+            text=(BotMessageText.confirm_feedback_success if saved else BotMessageText.confirm_feedback_failure).value,
             parse_mode='HTML'
         )
         # update message id
         data['last_msg_id'] = bot_message.message_id
         # set pause (give time to read)
         await asyncio.sleep(4)
-        # get admins
-        admins = await get_cache(key=CacheKeys.admins.value)
         # move back to menu
         await bot.send_message(
             chat_id=data['user_uid'],
             text=BotMessageText.menu_desc(),
             parse_mode='HTML',
-            reply_markup=main_menu_admin if (
-                    data['user_uid'] in admins or data['user_uid'] == MASTER_ADMIN
-            ) else main_menu_client
+            reply_markup=main_menu_admin if role in admin_roles else main_menu_client
         )
     # exit FSM
     await state.finish()
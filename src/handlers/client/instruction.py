@@ -1,23 +1,17 @@
-from typing import List
-
 from aiogram import types, Dispatcher
 
 from src.core.config import bot
-from src.core.enums import BotMessageText, CallbackData, CacheKeys
-from src.core.secrets import MASTER_ADMIN
+from src.core.enums import BotMessageText, CallbackData
 from src.keyboards import main_menu_client, main_menu_admin
-from src.utils.cache import get_cache
+from src.keyboards.navigation import admin_roles
 
 
-async def send_instruction(callback_query: types.CallbackQuery):
+async def send_instruction(callback_query: types.CallbackQuery, role: str):
     # annotate variables
     user_uid: int
-    admins: List[int]
 
     # get user uid
     user_uid = callback_query.from_user.id
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # send instruction
     await callback_query.message.edit_text(
         text=BotMessageText.instruction.value,
@@ -28,9 +22,7 @@ async def send_instruction(callback_query: types.CallbackQuery):
         chat_id=user_uid,
         text=BotMessageText.menu_desc(instruction=False),
         parse_mode='HTML',
-        reply_markup=main_menu_admin if (
-                user_uid == MASTER_ADMIN or user_uid in admins
-        ) else main_menu_client
+        reply_markup=main_menu_admin if role in admin_roles else main_menu_client
     )
 
     return
@@ -1,20 +1,18 @@
-from typing import Optional, List
+from typing import Optional
 
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 
 from src.core.config import bot
-from src.core.enums import BotMessageText, CacheKeys, ButtonText
-from src.core.secrets import MASTER_ADMIN
+from src.core.enums import BotMessageText, ButtonText
 from src.keyboards import main_menu_client, main_menu_admin
-from src.utils.cache import get_cache
+from src.keyboards.navigation import admin_roles
 
 
-async def start(message: types.Message, state: FSMContext):
+async def start(message: types.Message, state: FSMContext, role: str):
     # annotation
     user_uid: int
     cur_state: Optional[str]
-    admins: List[int]
 
     # get user uid
     user_uid = message.from_user.id
@@ -31,16 +29,12 @@ async def start(message: types.Message, state: FSMContext):
     await state.finish()
     # delete "/start" command from the chat
     await message.delete()
-    # get admins
-    admins = await get_cache(key=CacheKeys.admins.value)
     # send main menu
     await bot.send_message(
         chat_id=user_uid,
         text=BotMessageText.menu_desc(instruction=True),
         parse_mode='HTML',
-        reply_markup=main_menu_admin if (
-                user_uid == MASTER_ADMIN or user_uid in admins
-        ) else main_menu_client
+        reply_markup=main_menu_admin if role in admin_roles else main_menu_client
     )
 
     return
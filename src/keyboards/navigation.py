@@ -1,14 +1,12 @@
-from typing import Dict, FrozenSet, List
+from typing import Dict, FrozenSet
 
 from aiogram.types import InlineKeyboardMarkup
 
-from src.core.enums import CallbackData, CacheKeys
-from src.core.secrets import MASTER_ADMIN
+from src.core.enums import CallbackData, UserRole
 from src.keyboards import (
     admin_panel_menu, main_menu_admin, main_menu_client,
     doctors_settings_menu, statistics_menu, admins_config_menu
 )
-from src.utils.cache import get_cache
 
 # Admin menu navigation dictionary, basing on CallbackData
 admin_nav: Dict[str, InlineKeyboardMarkup] = {
@@ -36,11 +34,15 @@ privilege_pages: FrozenSet = frozenset([
     CallbackData.admins.value
 ])
 
+# roles which have access to admin pages
+admin_roles: FrozenSet = frozenset([
+    UserRole.master.value,
+    UserRole.high.value,
+    UserRole.low.value
+])
 
-# check user access
-async def check_access(user_uid: int) -> bool:
-    priv_admins: List[int] = await get_cache(key=CacheKeys.priv_admins.value)
-    if user_uid == MASTER_ADMIN or user_uid in priv_admins:
-        return True
-    else:
-        return False
+# roles which have access to privilege pages
+privilege_roles: FrozenSet = frozenset([
+    UserRole.master.value,
+    UserRole.high.value
+])
@@ -0,0 +1 @@
+from src.middlewares.role import RoleMiddleware
@@ -0,0 +1,34 @@
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from src.core.enums import UserRole
+from src.utils.cache import get_role
+
+
+class RoleMiddleware(BaseMiddleware):
+    """
+    Resolves the role of the user once per update and passes it
+    to the handlers as "role" argument.
+    """
+
+    async def on_process_message(self, message: types.Message, data: dict) -> None:
+        data['role'] = await self.resolve(user=message.from_user)
+
+        return
+
+    async def on_process_callback_query(self, callback_query: types.CallbackQuery, data: dict) -> None:
+        data['role'] = await self.resolve(user=callback_query.from_user)
+
+        return
+
+    async def on_process_pre_checkout_query(self, pre_checkout_query: types.PreCheckoutQuery, data: dict) -> None:
+        data['role'] = await self.resolve(user=pre_checkout_query.from_user)
+
+        return
+
+    @staticmethod
+    async def resolve(user: types.User) -> str:
+        # updates from channels have no sender
+        if user is None:
+            return UserRole.client.value
+        return await get_role(user_uid=user.id)
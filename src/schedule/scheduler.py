@@ -3,6 +3,7 @@ from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from src.core.enums import CallbackData, CacheKeys
+from src.db.rollup import update_rollup
 from src.schedule.tasks.health_check import check_parser
 from src.schedule.tasks.statistic import send_statistic
 from src.utils.cache import update_cache
@@ -29,6 +30,15 @@ def initialize_scheduler() -> None:
         minute='1',
         start_date=datetime.now()
     )
+    # add daily job (statistics rollup, before statistics are sent)
+    scheduler.add_job(
+        func=update_rollup,
+        trigger='cron',
+        day_of_week='0-6',
+        hour='0',
+        minute='1',
+        start_date=datetime.now()
+    )
     # add weekly job (statistic)
     scheduler.add_job(
         func=send_statistic,
@@ -7,7 +7,7 @@ from src.core.enums import BotMessageText, ConsultationType, Statistic
 from src.core.secrets import CHAT_ID_STATISTIC
 from src.db.base import Base
 from src.db.models import Appointment, CallBack, Feedback, User
-from src.handlers.admin.statistic import get_statistic, timedelta
+from src.handlers.admin.statistic import get_statistic, live_periods, timedelta
 
 
 async def send_statistic(period_type: str) -> None:
@@ -30,7 +30,8 @@ async def send_statistic(period_type: str) -> None:
         start_date=start_date,
         end_date=end_date,
         start_date_prev=start_date_prev,
-        change=True
+        change=True,
+        live=period_type in live_periods
     )
     # send statistic to the chat
     await bot.send_message(
@@ -1,2 +1,10 @@
-from src.utils.cache.functions import get_cache, cache_related_funcs, update_cache
+from src.utils.cache.functions import (
+    get_cache, get_many_cache, get_role, cache_related_funcs,
+    update_cache, invalidate_cache, bump_cache_version
+)
+from src.utils.cache.catalogue import (
+    get_doctors, get_doctors_by_speciality, get_doctor_by_photo,
+    get_price, update_catalogue
+)
 from src.utils.cache.db_cache import cache
+from src.utils.cache.bus import bus
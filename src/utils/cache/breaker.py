@@ -0,0 +1,80 @@
+from typing import Optional
+import time
+
+from src.core.enums import CircuitState
+from src.utils.misc import metrics
+
+breaker_state = metrics.gauge(
+    name='circuit_breaker_state',
+    description='Circuit breaker state (0 - closed, 1 - half-open, 2 - open)',
+    labels=('breaker',)
+)
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling a failing service for a cool-down window.
+
+    The breaker opens after several failures in a row, skips all the calls
+    while open and then lets a single trial call through (half-open state).
+    A successful trial closes the breaker, a failed one opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_time: float = 30) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_at: Optional[float] = None
+        self._report()
+
+    @property
+    def state(self) -> CircuitState:
+        if self._opened_at is None:
+            return CircuitState.closed
+        if time.monotonic() - self._opened_at >= self.recovery_time:
+            return CircuitState.half_open
+        return CircuitState.open
+
+    def allow(self) -> bool:
+        # annotation
+        state: CircuitState
+        now: float
+
+        state = self.state
+        self._report()
+        if state == CircuitState.closed:
+            return True
+        if state == CircuitState.open:
+            return False
+        # let a single trial call through (or a new one if the previous trial got lost)
+        now = time.monotonic()
+        if self._trial_at is None or now - self._trial_at >= self.recovery_time:
+            self._trial_at = now
+            return True
+
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial_at = None
+        self._report()
+
+        return
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_at = None
+        # open breaker (or open it again after the failed trial)
+        if self.failures >= self.failure_threshold or self._opened_at is not None:
+            self._opened_at = time.monotonic()
+        self._report()
+
+        return
+
+    def _report(self) -> None:
+        breaker_state.set(self.state.value, self.name)
+
+        return
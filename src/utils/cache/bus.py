@@ -0,0 +1,134 @@
+from typing import Callable, Dict, Optional
+import asyncio
+import json
+import uuid
+
+import aioredis
+
+from src.core.secrets import CACHE_BACKEND, DB_HOST, REDIS_PORT, REDIS_CACHE_CHANNEL
+
+
+class InvalidationBus(object):
+    """
+    Cross-instance cache invalidation over Redis pub/sub.
+
+    Every worker publishes keys it has updated and drops the keys
+    published by the other workers from its in-process cache. Versions
+    of versioned cache keys are kept in redis as well.
+    """
+
+    def __init__(self, host: str, port: str, channel: str) -> None:
+        self.channel = channel
+        # unique worker id (used to skip own messages)
+        self.worker_id = uuid.uuid4().hex
+        self._redis = aioredis.Redis(host=host, port=port)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, *keys: str, reload: bool = False) -> None:
+        # reload - values of the keys are not saved to memcached, so receivers load them from the db
+        try:
+            await self._redis.publish(
+                self.channel,
+                json.dumps({'worker': self.worker_id, 'keys': list(keys), 'reload': reload})
+            )
+        except (aioredis.RedisError, OSError) as e:
+            print('Cache invalidation was not published:', e)
+
+        return
+
+    async def get_version(self, key: str) -> Optional[int]:
+        # annotation
+        version: Optional[bytes]
+
+        try:
+            version = await self._redis.get(self._version_key(key))
+        except (aioredis.RedisError, OSError) as e:
+            print('Cache version was not read:', e)
+            return None
+
+        return int(version or 0)
+
+    async def bump_version(self, key: str) -> Optional[int]:
+        try:
+            return await self._redis.incr(self._version_key(key))
+        except (aioredis.RedisError, OSError) as e:
+            print('Cache version was not changed:', e)
+            return None
+
+    def start(self, on_invalidate: Callable) -> None:
+        if self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen(on_invalidate))
+
+        return
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._redis.close()
+
+        return
+
+    def _version_key(self, key: str) -> str:
+        return f'{self.channel}:{key}:version'
+
+    async def _listen(self, on_invalidate: Callable) -> None:
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # messages could be missed while not subscribed, so drop everything
+                on_invalidate()
+                async for message in pubsub.listen():
+                    data = json.loads(message['data'])
+                    if data['worker'] != self.worker_id and data['keys']:
+                        on_invalidate(*data['keys'], reload=data.get('reload', False))
+            except (aioredis.RedisError, OSError, ValueError) as e:
+                print('Cache invalidation listener failed:', e)
+            finally:
+                await pubsub.close()
+            # reconnect after pause
+            await asyncio.sleep(1)
+
+
+class MemoryBus(object):
+    """
+    Invalidation bus of a single process (used with the in-process cache backend).
+
+    There are no other workers to notify, so only versions are kept.
+    """
+
+    def __init__(self) -> None:
+        self._versions: Dict[str, int] = {}
+
+    async def publish(self, *keys: str, reload: bool = False) -> None:
+        return
+
+    async def get_version(self, key: str) -> Optional[int]:
+        return self._versions.get(key, 0)
+
+    async def bump_version(self, key: str) -> Optional[int]:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+        return self._versions[key]
+
+    def start(self, on_invalidate: Callable) -> None:
+        return
+
+    async def close(self) -> None:
+        return
+
+
+# invalidation bus (redis for memcached, process memory for the in-process cache)
+if CACHE_BACKEND == 'memory':
+    bus = MemoryBus()
+else:
+    bus = InvalidationBus(
+        host=DB_HOST,
+        port=REDIS_PORT,
+        channel=REDIS_CACHE_CHANNEL
+    )
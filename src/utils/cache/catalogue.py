@@ -0,0 +1,76 @@
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+
+from src.core.enums import CacheKeys
+from src.db.records import DoctorRecord
+from .functions import get_cache, bump_cache_version
+
+# catalogue records (same fields as the db queries return)
+DoctorName = namedtuple('DoctorName', ['id', 'photo', 'full_name'])
+DoctorCard = namedtuple('DoctorCard', [
+    'id', 'full_name', 'photo', 'description', 'speciality_id', 'speciality',
+    'experience', 'science_degree', 'qual_category', 'price'
+])
+
+# speciality attributes (as in Speciality model) -> catalogue fields
+speciality_fields: Dict[str, str] = {
+    'id': 'speciality_id',
+    'title': 'speciality'
+}
+
+
+async def get_doctors() -> List[DoctorName]:
+    # annotation
+    catalogue: List[Dict[str, Any]]
+    doctors: Dict[str, DoctorName]
+
+    catalogue = await get_cache(key=CacheKeys.catalogue.value)
+    # one record per doctor (doctors with several specialities have several records)
+    doctors = {}
+    for doctor in catalogue:
+        doctors.setdefault(doctor['id'], DoctorName(id=doctor['id'], photo=doctor['photo'], full_name=doctor['full_name']))
+
+    return sorted(doctors.values(), key=lambda doctor: doctor.full_name)
+
+
+async def get_doctors_by_speciality(**attribute) -> List[DoctorCard]:
+    # annotation
+    catalogue: List[Dict[str, Any]]
+    doctors: List[DoctorCard]
+
+    catalogue = await get_cache(key=CacheKeys.catalogue.value)
+    doctors = [
+        DoctorCard(**doctor) for doctor in catalogue
+        if all(doctor[speciality_fields[name]] == value for name, value in attribute.items())
+    ]
+
+    return sorted(doctors, key=lambda doctor: doctor.price, reverse=True)
+
+
+async def get_doctor_by_photo(photo: str) -> Optional[DoctorRecord]:
+    # annotation
+    catalogue: List[Dict[str, Any]]
+
+    catalogue = await get_cache(key=CacheKeys.catalogue.value)
+
+    # catalogue keeps one record per doctor speciality (as the db loader reads them)
+    return DoctorRecord.from_rows(doctor for doctor in catalogue if doctor['photo'] == photo)
+
+
+async def get_price(photo: str, speciality: str) -> Optional[int]:
+    # annotation
+    catalogue: List[Dict[str, Any]]
+
+    catalogue = await get_cache(key=CacheKeys.catalogue.value)
+    for doctor in catalogue:
+        if doctor['photo'] == photo and doctor['speciality'] == speciality:
+            return doctor['price']
+
+    return None
+
+
+async def update_catalogue() -> None:
+    # catalogue has changed (all the workers switch to the new version)
+    await bump_cache_version(CacheKeys.catalogue.value)
+
+    return
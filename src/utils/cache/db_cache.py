@@ -1,33 +1,289 @@
-import json
-
-from pymemcache.client.base import Client
-from pymemcache.client.retrying import RetryingClient
-from pymemcache.exceptions import MemcacheUnexpectedCloseError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+import asyncio
+import time
 
 from src.core import secrets
+from src.utils.cache.serde import SerdeError, VersionedSerde
+
+# memcached connection (stream reader and writer pair)
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class MemcacheError(Exception):
+    pass
+
+
+class AsyncClient(object):
+    """
+    Asyncio-native memcached client (text protocol).
+
+    Connections are kept in a bounded pool and opened lazily, every
+    command is limited by a timeout, so a slow or unreachable memcached
+    never blocks the event loop.
+    """
+
+    def __init__(self, server: Tuple[str, Any], serde: Any, pool_size: int = 10,
+                 connect_timeout: float = 1.0, timeout: float = 0.5,
+                 attempts: int = 2, retry_delay: float = 0.01) -> None:
+        self.server = server
+        self.serde = serde
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.attempts = attempts
+        self.retry_delay = retry_delay
+        # idle connections
+        self._pool: List[Connection] = []
+        # limits the number of simultaneously opened connections (created lazily inside the event loop)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        values = await self.get_many([key])
+
+        return values.get(key, default)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        return await self._execute(lambda reader, writer: self._fetch(reader, writer, keys))
+
+    async def set(self, key: str, value: Any, expire: int = 0) -> bool:
+        failed = await self.set_many({key: value}, expire=expire)
+
+        return not failed
+
+    async def set_many(self, values: Dict[str, Any], expire: int = 0) -> List[str]:
+        # annotation
+        commands: List[bytes]
+        stored: List[bool]
+
+        if not values:
+            return []
+        commands = []
+        for key, value in values.items():
+            data, flags = self.serde.serialize(key, value)
+            commands.append(self._storage_command(key=key, data=data, flags=flags, expire=expire))
+        stored = await self._execute(lambda reader, writer: self._store(reader, writer, commands))
+
+        # return keys which were not stored
+        return [key for key, is_stored in zip(values, stored) if not is_stored]
+
+    async def delete(self, key: str) -> bool:
+        command = b'delete ' + self._check_key(key) + b'\r\n'
+
+        async def _delete(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+            writer.write(command)
+            await writer.drain()
+            line = await self._read_line(reader)
+            if line not in (b'DELETED', b'NOT_FOUND'):
+                raise MemcacheError(line.decode(secrets.ENCODING, errors='replace'))
+            return line == b'DELETED'
+
+        return await self._execute(_delete)
+
+    async def close(self) -> None:
+        while self._pool:
+            _, writer = self._pool.pop()
+            writer.close()
+
+        return
+
+    async def _connect(self) -> Connection:
+        return await asyncio.wait_for(
+            asyncio.open_connection(host=self.server[0], port=self.server[1]),
+            timeout=self.connect_timeout
+        )
+
+    async def _acquire(self) -> Connection:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+        await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        try:
+            # reuse an idle connection or open a new one
+            if self._pool:
+                return self._pool.pop()
+            return await self._connect()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def _release(self, connection: Connection, reusable: bool) -> None:
+        if reusable:
+            self._pool.append(connection)
+        else:
+            connection[1].close()
+        self._semaphore.release()
+
+        return
+
+    async def _execute(self, command: Callable) -> Any:
+        for attempt in range(1, self.attempts + 1):
+            try:
+                connection = await self._acquire()
+            except asyncio.TimeoutError as e:
+                raise MemcacheError('memcached connection timeout') from e
+            except OSError as e:
+                raise MemcacheError(f'memcached is unreachable: {e}') from e
+            try:
+                result = await asyncio.wait_for(command(*connection), timeout=self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                # connection was closed by the server (retry with a fresh one)
+                self._release(connection, reusable=False)
+                if attempt == self.attempts:
+                    raise MemcacheError(f'memcached connection closed: {e}') from e
+                await asyncio.sleep(self.retry_delay)
+            except asyncio.TimeoutError as e:
+                self._release(connection, reusable=False)
+                raise MemcacheError('memcached command timeout') from e
+            except BaseException:
+                self._release(connection, reusable=False)
+                raise
+            else:
+                self._release(connection, reusable=True)
+                return result
+
+    async def _fetch(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                     keys: Iterable[str]) -> Dict[str, Any]:
+        # annotation
+        values: Dict[str, Any]
+        line: bytes
+
+        writer.write(b'get ' + b' '.join(self._check_key(key) for key in keys) + b'\r\n')
+        await writer.drain()
+        values = {}
+        line = await self._read_line(reader)
+        while line != b'END':
+            if not line.startswith(b'VALUE '):
+                raise MemcacheError(line.decode(secrets.ENCODING, errors='replace'))
+            # VALUE <key> <flags> <bytes>
+            _, key, flags, size = line.split(b' ')[:4]
+            data = (await reader.readexactly(int(size) + 2))[:-2]
+            key = key.decode(secrets.ENCODING)
+            # value written in unknown format (e.g. by a newer worker) is treated as a miss
+            try:
+                values[key] = self.serde.deserialize(key, data, int(flags))
+            except SerdeError as e:
+                print('Cached value was skipped:', e)
+            line = await self._read_line(reader)
+
+        return values
+
+    async def _store(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                     commands: List[bytes]) -> List[bool]:
+        # annotation
+        stored: List[bool]
+
+        # pipeline all commands and read replies afterwards
+        writer.write(b''.join(commands))
+        await writer.drain()
+        stored = []
+        for _ in commands:
+            line = await self._read_line(reader)
+            if line not in (b'STORED', b'NOT_STORED'):
+                raise MemcacheError(line.decode(secrets.ENCODING, errors='replace'))
+            stored.append(line == b'STORED')
+
+        return stored
+
+    def _storage_command(self, key: str, data: bytes, flags: int, expire: int) -> bytes:
+        return b'set %b %d %d %d\r\n%b\r\n' % (self._check_key(key), flags, expire, len(data), data)
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        return (await reader.readuntil(b'\r\n'))[:-2]
+
+    @staticmethod
+    def _check_key(key: str) -> bytes:
+        encoded = key.encode(secrets.ENCODING)
+        if not encoded or len(encoded) > 250 or any(c <= 32 or c == 127 for c in encoded):
+            raise MemcacheError(f'invalid memcached key: {key!r}')
+        return encoded
+
+
+class MemoryClient(object):
+    """
+    In-process replacement of the memcached client (for development and benchmarks).
+
+    Values are serialized as they are for memcached, so callers get copies
+    and the serialization cost is the same.
+    """
+
+    def __init__(self, serde: Any) -> None:
+        self.serde = serde
+        # key -> (expiration time or None, serialized value, flags)
+        self._data: Dict[str, Tuple[Optional[float], bytes, int]] = {}
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        values = await self.get_many([key])
+
+        return values.get(key, default)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        # annotation
+        values: Dict[str, Any]
+
+        values = {}
+        for key in keys:
+            entry = self._data.get(key)
+            if entry is None:
+                continue
+            # check if entry has expired
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                continue
+            try:
+                values[key] = self.serde.deserialize(key, entry[1], entry[2])
+            except SerdeError as e:
+                print('Cached value was skipped:', e)
+
+        return values
+
+    async def set(self, key: str, value: Any, expire: int = 0) -> bool:
+        failed = await self.set_many({key: value}, expire=expire)
+
+        return not failed
+
+    async def set_many(self, values: Dict[str, Any], expire: int = 0) -> List[str]:
+        for key, value in values.items():
+            data, flags = self.serde.serialize(key, value)
+            # 0 means that value never expires (as in memcached)
+            self._data[key] = (time.monotonic() + expire if expire else None, data, flags)
+
+        return []
+
+    async def delete(self, key: str) -> bool:
+        return self._data.pop(key, None) is not None
+
+    async def close(self) -> None:
+        self._data.clear()
+
+        return
+
+
+def create_client(backend: str) -> Union[AsyncClient, MemoryClient]:
+    # annotation
+    serde: VersionedSerde
+
+    serde = VersionedSerde(
+        format_name=secrets.CACHE_SERIALIZER,
+        compress_threshold=secrets.CACHE_COMPRESS_THRESHOLD,
+        compress_level=secrets.CACHE_COMPRESS_LEVEL
+    )
+    if backend == 'memory':
+        return MemoryClient(serde=serde)
+    if backend == 'memcached':
+        return AsyncClient(
+            server=(secrets.WEBAPPHOST, secrets.MEMCACHE_PORT),
+            serde=serde,
+            pool_size=secrets.MEMCACHE_POOL_SIZE,
+            connect_timeout=secrets.MEMCACHE_CONNECT_TIMEOUT,
+            timeout=secrets.MEMCACHE_TIMEOUT,
+            attempts=2,
+            retry_delay=0.01
+        )
+    raise ValueError(f'Unknown cache backend: {backend}')
 
 
-class JsonSerde(object):
-    def serialize(self, key, value):
-        if isinstance(value, str):
-            return value.encode(secrets.ENCODING), 1
-        return json.dumps(value).encode(secrets.ENCODING), 2
-
-    def deserialize(self, key, value, flag):
-        if flag == 1:
-            return value.decode(secrets.ENCODING)
-        if flag == 2:
-            return json.loads(value.decode(secrets.ENCODING))
-        raise Exception("Unknown serialization format")
-
-
-base_cache = Client(
-    server=(secrets.WEBAPPHOST, secrets.MEMCACHE_PORT),
-    serde=JsonSerde()
-)
-cache = RetryingClient(
-    base_cache,
-    attempts=2,
-    retry_delay=0.01,
-    retry_for=[MemcacheUnexpectedCloseError]
-)
+cache = create_client(backend=secrets.CACHE_BACKEND)
@@ -1,50 +1,472 @@
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import functools
+import math
+import random
+import time
 
-from src.core.secrets import CACHE_TIME
-from src.core.enums import CacheKeys, AdminPrivilegeType
-from src.db.query import get_admins_ids, get_specialities
+from src.core.secrets import (
+    CACHE_TIME, CACHE_SOFT_TIME, CACHE_EARLY_REFRESH, CACHE_BREAKER_THRESHOLD,
+    CACHE_BREAKER_COOLDOWN, CACHE_BACKEND, LOCAL_CACHE_SIZE, LOCAL_CACHE_TIME, MASTER_ADMIN
+)
+from src.core.enums import CacheKeys, UserRole
+from src.db.query import get_admins_roles, get_catalogue, get_specialities
+from src.utils.misc import metrics
+from .breaker import CircuitBreaker
+from .bus import bus
 from .db_cache import cache
+from .local_cache import LocalCache
+
+# per key cache metrics (tier - local, memcached or fallback)
+cache_hits = metrics.counter(
+    name='cache_hits_total',
+    description='Cache hits',
+    labels=('key', 'tier')
+)
+cache_misses = metrics.counter(
+    name='cache_misses_total',
+    description='Cache misses',
+    labels=('key', 'tier')
+)
+cache_errors = metrics.counter(
+    name='cache_errors_total',
+    description='Cache errors (read, write, delete, load or version)',
+    labels=('key', 'operation')
+)
+cache_refills = metrics.counter(
+    name='cache_refills_total',
+    description='Cache refills from the db (reason - miss, stale or update)',
+    labels=('key', 'reason')
+)
+cache_latency = metrics.histogram(
+    name='cache_get_seconds',
+    description='Time to get value from cache',
+    labels=('key',)
+)
+refill_latency = metrics.histogram(
+    name='cache_refill_seconds',
+    description='Time to load value from the db',
+    labels=('key',)
+)
+backend_latency = metrics.histogram(
+    name='cache_backend_seconds',
+    description='Time of cache backend calls (memcached or memory)',
+    labels=('backend', 'operation')
+)
 
 # functions which fill cache under particular keys
+# soft_ttl - time after which the value is served stale and refreshed in background
+# hard_ttl - time after which the value is dropped from cache (and loaded on the request)
+# versioned - value is stored under the current version of the key ("key:version"),
+#             so bumping the version makes all the previous values unreachable
 cache_related_funcs: Dict[str, Dict[str, Any]] = {
-    CacheKeys.admins.value: {
-        'func': get_admins_ids,
-        'kwargs': {}
+    CacheKeys.roles.value: {
+        'func': get_admins_roles,
+        'kwargs': {},
+        'soft_ttl': CACHE_SOFT_TIME,
+        'hard_ttl': CACHE_TIME,
+        'versioned': False
     },
     CacheKeys.specialities.value: {
         'func': get_specialities,
-        'kwargs': {}
+        'kwargs': {},
+        'soft_ttl': CACHE_SOFT_TIME,
+        'hard_ttl': CACHE_TIME,
+        'versioned': False
     },
-    CacheKeys.priv_admins.value: {
-        'func': get_admins_ids,
-        'kwargs': {
-            'privilege_type': AdminPrivilegeType.high.value
-        }
+    CacheKeys.catalogue.value: {
+        'func': get_catalogue,
+        'kwargs': {},
+        'soft_ttl': CACHE_SOFT_TIME,
+        'hard_ttl': CACHE_TIME,
+        'versioned': True
     }
 }
 
+# separates key and its version
+VERSION_SEPARATOR: str = ':'
+
+# namespace of cache entries in memcached (entries differ from plain values of previous releases,
+# so workers of different releases never read each other's values during a rolling deploy)
+ENTRY_PREFIX: str = 'v2:'
+
+# in-process cache tier (in front of memcached)
+local_cache = LocalCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TIME)
+
+# last known cache entries (used while memcached doesn't work)
+fallback_cache = LocalCache(maxsize=LOCAL_CACHE_SIZE, ttl=CACHE_TIME)
+
+# last known versions of versioned keys (the versions themselves are kept by the invalidation bus)
+versions = LocalCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TIME)
+
+# skips memcached after repeated failures
+breaker = CircuitBreaker(
+    name='memcached',
+    failure_threshold=CACHE_BREAKER_THRESHOLD,
+    recovery_time=CACHE_BREAKER_COOLDOWN
+)
+
+# refills in progress (one per key, concurrent callers await the same future)
+_refills: Dict[str, 'asyncio.Future'] = {}
+
+# saves of refilled entries to memcached in progress (result - whether the entry is saved),
+# readers don't wait for them, updates do (other workers read memcached on invalidation)
+_saves: Dict[str, 'asyncio.Future'] = {}
+
 
 async def get_cache(key):
-    try:
-        # update cache (if empty)
-        if cache.get(key=key) is None:
-            cache.set(
-                key=key,
-                value=await cache_related_funcs[key]['func'](**cache_related_funcs[key]['kwargs']),
-                expire=CACHE_TIME
-            )
-        return cache.get(key=key)
-    except:
-        # if cache doesn't work use db query
-        return await cache_related_funcs[key]['func'](**cache_related_funcs[key]['kwargs']),
+    # annotation
+    start: float
+    versioned_key: Optional[str]
+    value: Any
+
+    start = time.monotonic()
+    # get the key of the current version
+    versioned_key = await _versioned_key(key)
+    if versioned_key is None:
+        # version is unknown, so the cache can't be used
+        cache_errors.inc(key, 'version')
+        return (await _load(key))['value']
+    key = versioned_key
+    # check in-process cache first
+    value = local_cache.get(key)
+    if value is not None:
+        cache_hits.inc(_label(key), 'local')
+        cache_latency.observe(time.monotonic() - start, _label(key))
+        return value
+    value = (await get_many_cache(key))[key]
+
+    return value
+
+
+async def get_many_cache(*keys) -> Dict[str, Any]:
+    # annotation
+    start: float
+    values: Dict[str, Any]
+    missing: List[str]
+    entries: Dict[str, Any]
+    tier: str
+    stale: List[str]
+
+    start = time.monotonic()
+    # check in-process cache first
+    values = {key: local_cache.get(key) for key in keys}
+    missing = [key for key, value in values.items() if value is None]
+    _report_lookup(values, tier='local')
+    if not missing:
+        _report_latency(keys, start)
+        return values
+    # get the rest in one round trip
+    entries = await _get_entries(missing)
+    tier = 'memcached'
+    if entries is None:
+        # if cache doesn't work use the last known entries
+        entries = {key: fallback_cache.get(key) for key in missing}
+        tier = 'fallback'
+    stale = []
+    for key in missing:
+        entry = entries.get(key)
+        if _is_entry(entry):
+            values[key] = entry['value']
+            local_cache.set(key, entry['value'])
+            fallback_cache.set(key, entry, ttl=_settings(key)['hard_ttl'])
+            if _is_stale(entry):
+                stale.append(key)
+    _report_lookup({key: values[key] for key in missing}, tier=tier)
+    # serve stale values and refresh them in background
+    if stale:
+        _refill(*stale, reason='stale')
+    # update cache (if empty)
+    missing = [key for key in missing if values[key] is None]
+    if missing:
+        values.update(zip(missing, await asyncio.gather(*map(asyncio.shield, _refill(*missing, reason='miss')))))
+    _report_latency(keys, start)
+
+    return values
+
+
+async def get_role(user_uid: int) -> str:
+    # annotation
+    roles: Dict[str, str]
+
+    # check if user is the super admin
+    if user_uid == MASTER_ADMIN:
+        return UserRole.master.value
+    # get admins roles (tg uid -> privilege type)
+    roles = await get_cache(key=CacheKeys.roles.value)
+
+    return roles.get(str(user_uid), UserRole.client.value)
+
+
+def invalidate_cache(*keys, reload: bool = False) -> None:
+    # drop keys from the in-process cache (all keys if nothing is specified)
+    local_cache.invalidate(*keys)
+    # forget their versions as well (they're read again on the next request)
+    versions.invalidate(*{key.partition(VERSION_SEPARATOR)[0] for key in keys})
+    # new values didn't reach memcached, so the previous ones are dropped and the new ones are loaded from the db
+    if reload and keys:
+        fallback_cache.invalidate(*keys)
+        _refill(*keys, reason='update')
+
+    return
 
 
 async def update_cache(*keys) -> None:
+    # annotation
+    pending: List['asyncio.Future']
+    refills: List['asyncio.Future']
+    saves: List['asyncio.Future']
+    saved: List[bool]
+    unsaved: List[str]
+
+    # get keys of the current versions (skip keys with unknown version)
+    keys = [key for key in await asyncio.gather(*map(_versioned_key, keys)) if key is not None]
+    if not keys:
+        return
+    # wait for the refills started before the change (their results may be outdated)
+    pending = [_refills[key] for key in keys if key in _refills]
+    if pending:
+        await asyncio.wait(pending)
+    # and for their saves, so they don't overwrite the new values
+    pending = [_saves[key] for key in keys if key in _saves]
+    if pending:
+        await asyncio.wait(pending)
+    # readers keep getting the previous values until the new ones are loaded
+    refills = _refill(*keys, reason='update')
+    saves = [_saves[key] for key in keys]
+    await asyncio.gather(*map(asyncio.shield, refills))
+    # wait until the new values are saved, since other workers read memcached on invalidation
+    saved = await asyncio.gather(*map(asyncio.shield, saves))
+    unsaved = [key for key, is_saved in zip(keys, saved) if not is_saved]
+    # drop the previous values of the keys which were not saved
+    for key in unsaved:
+        await _delete_entry(key)
+    # notify other workers (they load the values which were not saved from the db)
+    if len(unsaved) < len(keys):
+        await bus.publish(*[key for key in keys if key not in unsaved])
+    if unsaved:
+        await bus.publish(*unsaved, reload=True)
+
+    return
+
+
+async def bump_cache_version(*keys) -> None:
+    # annotation
+    version: Optional[int]
+
     for key in keys:
-        cache.set(
-            key=key,
-            value=await cache_related_funcs[key]['func'](**cache_related_funcs[key]['kwargs']),
-            expire=CACHE_TIME
-        )
+        # all the entries of the previous versions become unreachable
+        version = await bus.bump_version(key)
+        if version is None:
+            versions.invalidate(key)
+        else:
+            versions.set(key, version)
+    # load values of the new versions (other workers read new versions on invalidation)
+    await update_cache(*keys)
 
     return
+
+
+def _refill(*keys, reason: str = 'miss') -> List['asyncio.Future']:
+    # annotation
+    missing: List[str]
+
+    # start the only refill per key
+    missing = [key for key in keys if key not in _refills]
+    if missing:
+        for key in missing:
+            cache_refills.inc(_label(key), reason)
+            _refills[key] = asyncio.get_event_loop().create_future()
+            _refills[key].add_done_callback(functools.partial(_report_refill, key))
+            _saves[key] = asyncio.get_event_loop().create_future()
+        asyncio.ensure_future(_load_many(missing))
+
+    return [_refills[key] for key in keys]
+
+
+def _report_refill(key: str, future: 'asyncio.Future') -> None:
+    # report failed background refresh (nobody may be waiting for it)
+    if not future.cancelled() and future.exception() is not None:
+        print(f'Cache refill of "{key}" failed:', future.exception())
+
+    return
+
+
+async def _load_many(keys: List[str]) -> None:
+    # annotation
+    saves: Dict[str, 'asyncio.Future']
+    results: List[Any]
+    entries: Dict[str, Dict[str, Any]]
+    unsaved: Set[str]
+
+    saves = {key: _saves[key] for key in keys}
+    results = [RuntimeError('Cache refill was interrupted')] * len(keys)
+    entries = {}
+    unsaved = set(keys)
+    try:
+        try:
+            # query the db for all the keys concurrently
+            results = await asyncio.gather(*map(_load, keys), return_exceptions=True)
+            entries = {key: entry for key, entry in zip(keys, results) if not isinstance(entry, BaseException)}
+            for key, entry in entries.items():
+                local_cache.set(key, entry['value'])
+                fallback_cache.set(key, entry, ttl=_settings(key)['hard_ttl'])
+        finally:
+            # pass results to the waiting callers (they never wait for memcached)
+            for key, entry in zip(keys, results):
+                future = _refills.pop(key)
+                if isinstance(entry, BaseException):
+                    cache_errors.inc(_label(key), 'load')
+                    future.set_exception(entry)
+                else:
+                    future.set_result(entry['value'])
+        # save entries in one round trip (per expiration time)
+        unsaved = {key for key in keys if key not in entries}
+        for hard_ttl in {_settings(key)['hard_ttl'] for key in entries}:
+            unsaved.update(await _set_entries(
+                {key: entry for key, entry in entries.items() if _settings(key)['hard_ttl'] == hard_ttl},
+                expire=hard_ttl
+            ))
+    finally:
+        for key, saved in saves.items():
+            saved.set_result(key not in unsaved)
+            if _saves.get(key) is saved:
+                del _saves[key]
+
+    return
+
+
+async def _get_entries(keys: List[str]) -> Optional[Dict[str, Any]]:
+    # annotation
+    start: float
+    entries: Dict[str, Any]
+
+    # skip memcached while it doesn't work
+    if not breaker.allow():
+        return None
+    start = time.monotonic()
+    try:
+        entries = await cache.get_many([ENTRY_PREFIX + key for key in keys])
+    except Exception as e:
+        print('Cache read failed:', e)
+        for key in keys:
+            cache_errors.inc(_label(key), 'read')
+        breaker.record_failure()
+        return None
+    backend_latency.observe(time.monotonic() - start, CACHE_BACKEND, 'read')
+    breaker.record_success()
+
+    return {key: entries.get(ENTRY_PREFIX + key) for key in keys}
+
+
+async def _set_entries(entries: Dict[str, Any], expire: int) -> List[str]:
+    # annotation
+    start: float
+    failed: List[str]
+
+    # skip memcached while it doesn't work
+    if not breaker.allow():
+        return list(entries)
+    start = time.monotonic()
+    try:
+        failed = await cache.set_many({ENTRY_PREFIX + key: entry for key, entry in entries.items()}, expire=expire)
+    except Exception as e:
+        print('Cache write failed:', e)
+        for key in entries:
+            cache_errors.inc(_label(key), 'write')
+        breaker.record_failure()
+        return list(entries)
+    backend_latency.observe(time.monotonic() - start, CACHE_BACKEND, 'write')
+    breaker.record_success()
+
+    # return keys which were not saved
+    return [key for key in entries if ENTRY_PREFIX + key in failed]
+
+
+async def _delete_entry(key: str) -> None:
+    # skip memcached while it doesn't work (readers of other workers reload the key anyway)
+    if not breaker.allow():
+        return
+    try:
+        await cache.delete(ENTRY_PREFIX + key)
+    except Exception as e:
+        print('Cache delete failed:', e)
+        cache_errors.inc(_label(key), 'delete')
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    return
+
+
+async def _load(key: str) -> Dict[str, Any]:
+    # annotation
+    start: float
+    value: Any
+    delta: float
+
+    # query the db and measure how long it takes
+    start = time.monotonic()
+    value = await _settings(key)['func'](**_settings(key)['kwargs'])
+    delta = time.monotonic() - start
+    refill_latency.observe(delta, _label(key))
+
+    return {
+        'value': value,
+        'delta': delta,
+        'soft_expiry': time.time() + _settings(key)['soft_ttl']
+    }
+
+
+def _label(key: str) -> str:
+    # versions are not reported (metrics of all the versions are summed up)
+    return key.partition(VERSION_SEPARATOR)[0]
+
+
+def _report_lookup(values: Dict[str, Any], tier: str) -> None:
+    for key, value in values.items():
+        if value is None:
+            cache_misses.inc(_label(key), tier)
+        else:
+            cache_hits.inc(_label(key), tier)
+
+    return
+
+
+def _report_latency(keys: Iterable[str], start: float) -> None:
+    for key in keys:
+        cache_latency.observe(time.monotonic() - start, _label(key))
+
+    return
+
+
+def _settings(key: str) -> Dict[str, Any]:
+    # versioned keys share settings of the key itself
+    return cache_related_funcs[key.partition(VERSION_SEPARATOR)[0]]
+
+
+async def _versioned_key(key: str) -> Optional[str]:
+    # annotation
+    version: Optional[int]
+
+    if not _settings(key)['versioned'] or VERSION_SEPARATOR in key:
+        return key
+    # get the current version (once per in-process cache time or invalidation)
+    version = versions.get(key)
+    if version is None:
+        version = await bus.get_version(key)
+        if version is None:
+            return None
+        versions.set(key, version)
+
+    return f'{key}{VERSION_SEPARATOR}{version}'
+
+
+def _is_entry(entry: Any) -> bool:
+    return isinstance(entry, dict) and 'value' in entry and 'soft_expiry' in entry
+
+
+def _is_stale(entry: Dict[str, Any]) -> bool:
+    # probabilistic early expiration (XFetch): refresh gets more likely
+    # as the entry approaches its soft expiry and the slower its loader is
+    return time.time() - entry['delta'] * CACHE_EARLY_REFRESH * math.log(1.0 - random.random()) >= entry['soft_expiry']
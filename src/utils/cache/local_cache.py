@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+import time
+
+
+class LocalCache(object):
+    """
+    Bounded in-process cache with TTL.
+
+    Entries are evicted in LRU order when the cache is full and ignored
+    after their TTL has expired. Cached values are shared between callers
+    and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (expiration time, value)
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        # annotation
+        entry: Optional[Tuple[float, Any]]
+
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        # check if entry has expired
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        # evict the least recently used entries
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+        return
+
+    def invalidate(self, *keys: Hashable) -> None:
+        # drop specified keys (or all the entries if nothing is specified)
+        if not keys:
+            self._data.clear()
+        for key in keys:
+            self._data.pop(key, None)
+
+        return
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, default=self) is not self
+
+    def __len__(self) -> int:
+        return len(self._data)
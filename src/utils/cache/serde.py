@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, Tuple
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from src.core import secrets
+
+# memcached flags layout: bits 0-7 - format id, bit 8 - compression, bits 9-15 - layout version
+FORMAT_MASK: int = 0xFF
+COMPRESSED: int = 1 << 8
+VERSION_SHIFT: int = 9
+# version 0 is the plain JsonSerde layout (no compression), so it's used whenever possible
+SERDE_VERSION: int = 1
+
+
+class SerdeError(Exception):
+    pass
+
+
+class Format(object):
+    def __init__(self, name: str, format_id: int,
+                 dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]) -> None:
+        self.name = name
+        self.format_id = format_id
+        self.dumps = dumps
+        self.loads = loads
+
+
+# serialization formats (format name -> format, format id -> format)
+formats: Dict[str, Format] = {}
+formats_by_id: Dict[int, Format] = {}
+
+
+def register_format(name: str, format_id: int,
+                    dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]) -> None:
+    if not 0 < format_id <= FORMAT_MASK:
+        raise ValueError(f'format id must be in range 1-{FORMAT_MASK}')
+    if format_id in formats_by_id and formats_by_id[format_id].name != name:
+        raise ValueError(f'format id {format_id} is already used by "{formats_by_id[format_id].name}"')
+    formats[name] = formats_by_id[format_id] = Format(
+        name=name,
+        format_id=format_id,
+        dumps=dumps,
+        loads=loads
+    )
+
+    return
+
+
+# ids 1 and 2 are the same as JsonSerde ones (do not change them)
+register_format(
+    name='str',
+    format_id=1,
+    dumps=lambda value: value.encode(secrets.ENCODING),
+    loads=lambda data: data.decode(secrets.ENCODING)
+)
+register_format(
+    name='json',
+    format_id=2,
+    dumps=lambda value: json.dumps(value).encode(secrets.ENCODING),
+    loads=lambda data: json.loads(data.decode(secrets.ENCODING))
+)
+if msgpack is not None:
+    register_format(
+        name='msgpack',
+        format_id=3,
+        dumps=lambda value: msgpack.packb(value, use_bin_type=True),
+        loads=lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False)
+    )
+
+
+class VersionedSerde(object):
+    """
+    Serializer which keeps format id, compression flag and layout version
+    in memcached flags, so workers with different settings (or versions)
+    can read each other's values during a rolling deploy.
+
+    Values are compressed with zlib when they are larger than the threshold
+    (0 disables compression). Uncompressed str/json values are written in
+    the plain JsonSerde layout.
+    """
+
+    def __init__(self, format_name: str = 'json', compress_threshold: int = 0, compress_level: int = 6) -> None:
+        if format_name not in formats:
+            print(f'Serialization format "{format_name}" is not available, "json" is used instead')
+            format_name = 'json'
+        self.format = formats[format_name]
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def serialize(self, key: str, value: Any) -> Tuple[bytes, int]:
+        # annotation
+        value_format: Format
+        data: bytes
+        flags: int
+
+        value_format = formats['str'] if isinstance(value, str) else self.format
+        data = value_format.dumps(value)
+        flags = value_format.format_id
+        if 0 < self.compress_threshold < len(data):
+            data = zlib.compress(data, self.compress_level)
+            flags |= COMPRESSED
+        # mark values which can't be read by JsonSerde
+        if flags & COMPRESSED or value_format.name not in ('str', 'json'):
+            flags |= SERDE_VERSION << VERSION_SHIFT
+
+        return data, flags
+
+    def deserialize(self, key: str, value: bytes, flags: int) -> Any:
+        # annotation
+        value_format: Format
+
+        if flags >> VERSION_SHIFT > SERDE_VERSION:
+            raise SerdeError(f'unsupported serialization version of "{key}": {flags >> VERSION_SHIFT}')
+        value_format = formats_by_id.get(flags & FORMAT_MASK)
+        if value_format is None:
+            raise SerdeError(f'unknown serialization format of "{key}": {flags & FORMAT_MASK}')
+        try:
+            if flags & COMPRESSED:
+                value = zlib.decompress(value)
+            return value_format.loads(value)
+        except Exception as e:
+            raise SerdeError(f'value of "{key}" is corrupted: {e}') from e
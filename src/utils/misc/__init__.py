@@ -1 +1,2 @@
 from src.utils.misc.logging import logger
+from src.utils.misc import metrics
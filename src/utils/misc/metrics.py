@@ -0,0 +1,176 @@
+from typing import Dict, List, Optional, Tuple, Union
+import bisect
+
+from aiohttp import web
+
+# metric labels values
+Labels = Tuple[str, ...]
+
+# default histogram buckets (in seconds)
+BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Gauge(object):
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+        return
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        return [(self.name, labels, value) for labels, value in self._values.items()]
+
+
+class Counter(Gauge):
+    kind = 'counter'
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+        return
+
+
+class Histogram(object):
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (observations per bucket, sum of observed values)
+        self._values: Dict[Labels, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        # annotation
+        counts: List[int]
+        total: float
+
+        counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+        # the last bucket is +Inf
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._values[labels] = (counts, total + value)
+
+        return
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        # annotation
+        samples: List[Tuple[str, Labels, float]]
+
+        # cumulative buckets (the bucket bound is the last label value)
+        samples = []
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', labels + (_format_value(bound),), cumulative))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, cumulative))
+
+        return samples
+
+
+# registered metric
+Metric = Union[Gauge, Counter, Histogram]
+
+# all the registered metrics
+registry: Dict[str, Metric] = {}
+
+# metrics http server (started on demand)
+_runner: Optional[web.AppRunner] = None
+
+
+def gauge(name: str, description: str, labels: Tuple[str, ...] = ()) -> Gauge:
+    if name not in registry:
+        registry[name] = Gauge(name=name, description=description, labels=labels)
+
+    return registry[name]
+
+
+def counter(name: str, description: str, labels: Tuple[str, ...] = ()) -> Counter:
+    if name not in registry:
+        registry[name] = Counter(name=name, description=description, labels=labels)
+
+    return registry[name]
+
+
+def histogram(name: str, description: str, labels: Tuple[str, ...] = (),
+              buckets: Tuple[float, ...] = BUCKETS) -> Histogram:
+    if name not in registry:
+        registry[name] = Histogram(name=name, description=description, labels=labels, buckets=buckets)
+
+    return registry[name]
+
+
+def render() -> str:
+    # annotation
+    lines: List[str]
+
+    # prometheus text exposition format
+    lines = []
+    for metric in registry.values():
+        lines.append(f'# HELP {metric.name} {metric.description}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        label_names = metric.labels + (('le',) if metric.kind == 'histogram' else ())
+        for name, labels, value in metric.samples():
+            if labels:
+                pairs = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(label_names, labels))
+                name = f'{name}{{{pairs}}}'
+            lines.append(f'{name} {_format_value(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+async def start_server(host: str, port: int) -> None:
+    # annotation
+    app: web.Application
+
+    global _runner
+    if _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_get('/metrics', _handle_metrics)
+    _runner = web.AppRunner(app)
+    await _runner.setup()
+    try:
+        await web.TCPSite(_runner, host=host, port=port).start()
+    except OSError as e:
+        # port is taken (e.g. by another worker on the same host), the bot works without the endpoint
+        print('Metrics endpoint is disabled:', e)
+        await _runner.cleanup()
+        _runner = None
+
+    return
+
+
+async def stop_server() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
+
+    return
+
+
+async def _handle_metrics(_: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type='text/plain', charset='utf-8')
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
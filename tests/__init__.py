@@ -0,0 +1,19 @@
+"""
+Tests run without external services: the in-process cache backend is used
+and secrets which are not set in the environment (or .env) get test values.
+"""
+import os
+import tempfile
+
+# the in-process cache backend and invalidation bus are always used
+os.environ['CACHE_BACKEND'] = 'memory'
+for name, value in {
+    'TOKEN': 'test', 'CHAT_ID': '0', 'CHAT_ID_STATISTIC': '0',
+    'WEBAPPURL': 'localhost', 'WEBAPPHOST': 'localhost', 'WEBAPPPORT': '0',
+    'DB_PORT': '3306', 'DB_HOST': 'localhost', 'DB_USER': 'test', 'DB_PWD': 'test',
+    'DB_NAME': 'test', 'DB_SOCKETPATH': '', 'CACHE_TIME': '3600',
+    'LOG_PATH': tempfile.gettempdir() + os.sep, 'LOG_SIZE': '1000000', 'N_LOGS': '1',
+    'ENCODING': 'utf-8', 'YOOKASSA_TOKEN': 'test', 'MASTER_ADMIN': '0',
+    'PHOTO_GALLERY_PATH': tempfile.gettempdir() + os.sep, 'PHOTO_EXTENSION': 'jpg'
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from src.core.enums import CacheKeys
+from src.utils.cache import functions
+from src.utils.cache.db_cache import MemcacheError
+
+KEY = CacheKeys.roles.value
+# admin 1 is deleted, admin 2 is created
+OLD_ROLES = {'1': 'high'}
+NEW_ROLES = {'2': 'low'}
+
+
+class UpdateCacheTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Other workers drop their in-process values on invalidation and read
+    memcached (or reload from the db), so none of them may get the
+    previous value after the update is published.
+    """
+
+    async def asyncSetUp(self) -> None:
+        # previous value is cached in every tier
+        await functions.cache.close()
+        functions.local_cache.invalidate()
+        functions.fallback_cache.invalidate()
+        functions.versions.invalidate()
+        functions.breaker.record_success()
+        entry = {'value': OLD_ROLES, 'delta': 0.0, 'soft_expiry': time.time() + 600}
+        await functions.cache.set_many({functions.ENTRY_PREFIX + KEY: entry}, expire=3600)
+        functions.local_cache.set(KEY, OLD_ROLES)
+        functions.fallback_cache.set(KEY, entry)
+        # db returns the new value, published messages are recorded
+        self.published = []
+        for patch in (
+            mock.patch.dict(functions.cache_related_funcs[KEY], {'func': mock.AsyncMock(return_value=NEW_ROLES)}),
+            mock.patch.object(functions.bus, 'publish', side_effect=self._publish)
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def _publish(self, *keys, reload=False) -> None:
+        # remember what other workers read from memcached when they get the message
+        entries = await functions.cache.get_many([functions.ENTRY_PREFIX + key for key in keys])
+        values = {key: entries.get(functions.ENTRY_PREFIX + key, {}).get('value') for key in keys}
+        self.published.append((keys, reload, values))
+
+    async def test_slow_write_is_saved_before_publish(self) -> None:
+        set_many = functions.cache.set_many
+
+        async def slow_set_many(values, expire=0):
+            await asyncio.sleep(0.05)
+            return await set_many(values, expire=expire)
+
+        with mock.patch.object(functions.cache, 'set_many', side_effect=slow_set_many):
+            await functions.update_cache(KEY)
+
+        self.assertEqual(self.published, [((KEY,), False, {KEY: NEW_ROLES})])
+
+    async def test_failed_write_drops_previous_value(self) -> None:
+        with mock.patch.object(functions.cache, 'set_many', side_effect=MemcacheError('unavailable')):
+            await functions.update_cache(KEY)
+
+        self.assertEqual(self.published, [((KEY,), True, {KEY: None})])
+
+    async def test_skipped_write_makes_workers_reload(self) -> None:
+        with mock.patch.object(functions.breaker, 'allow', return_value=False):
+            await functions.update_cache(KEY)
+            self.assertEqual([(keys, reload) for keys, reload, _ in self.published], [((KEY,), True)])
+            # another worker still keeps the previous value in its tiers
+            functions.local_cache.set(KEY, OLD_ROLES)
+            functions.fallback_cache.set(KEY, {'value': OLD_ROLES, 'delta': 0.0, 'soft_expiry': time.time() + 600})
+            functions.invalidate_cache(KEY, reload=True)
+
+            self.assertEqual(await functions.get_cache(KEY), NEW_ROLES)
+
+
+if __name__ == '__main__':
+    unittest.main()